@@ -164,6 +164,53 @@ if [ -z "$CHENGC_SCRIPT" ]; then
   exit 1
 fi
 
+sha256_stream() {
+  if command -v sha256sum >/dev/null 2>&1; then
+    sha256sum | awk '{print $1}'
+  else
+    shasum -a 256 | awk '{print $1}'
+  fi
+}
+
+sha256_files() {
+  if command -v sha256sum >/dev/null 2>&1; then
+    xargs -0 sha256sum
+  else
+    xargs -0 shasum -a 256
+  fi
+}
+
+# Hash every file under the given dirs (relative path + content hash).
+tree_digest() {
+  local dir=""
+  for dir in "$@"; do
+    [ -d "$dir" ] || continue
+    (cd "$dir" && find . -type f ! -name '.DS_Store' -print0 | LC_ALL=C sort -z | sha256_files)
+  done | sha256_stream
+}
+
+# Compiler revision: git HEAD plus uncommitted diff of the toolchain checkout, or the
+# chengc script itself when the toolchain is not a git checkout.
+toolchain_identity() {
+  local tool_dir
+  tool_dir="$(cd "$(dirname "$CHENGC_SCRIPT")" && pwd)"
+  {
+    cat "$CHENGC_SCRIPT"
+    if command -v git >/dev/null 2>&1 && git -C "$tool_dir" rev-parse HEAD >/dev/null 2>&1; then
+      git -C "$tool_dir" rev-parse HEAD
+      git -C "$tool_dir" diff HEAD 2>/dev/null || true
+    fi
+    # The selected driver (explicit or auto-detected), so a rebuilt driver misses.
+    if [ -f "$BACKEND_DRIVER" ]; then
+      printf '%s\n' "$BACKEND_DRIVER"
+      cat "$BACKEND_DRIVER"
+    fi
+    uname -sm 2>/dev/null || true
+    printf '%s\n' "$BACKEND_LINKER" "$BACKEND_FRONTEND" "$GENERIC_MODE" "$GENERIC_SPEC_BUDGET" \
+      "${BACKEND_TARGET:-}" "${CFLAGS:-}"
+  } | sha256_stream
+}
+
 # Prefer a verified backend driver. This avoids silently falling back to
 # stage0 lexer binaries that cannot compile the workspace.
 if [ -z "${BACKEND_DRIVER:-}" ]; then
@@ -209,6 +256,46 @@ if [ -z "${BACKEND_DRIVER:-}" ]; then
   exit 1
 fi
 
+# Content-addressed build cache: an unchanged source tree built by the same toolchain
+# (including the driver selected above) restores the previous binary instead of
+# recompiling.
+BUILD_CACHE="${CODEX_BUILD_CACHE:-1}"
+BUILD_CACHE_DIR="${CODEX_BUILD_CACHE_DIR:-$OUT_DIR/cache}"
+BUILD_CACHE_KEEP="${CODEX_BUILD_CACHE_KEEP:-5}"
+BUILD_KEY=""
+if [ "$BUILD_CACHE" != "0" ]; then
+  source_key="$(tree_digest "$(dirname "$SRC")" "${LIBP2P_WORK:-}")"
+  package_key="$({ cat "$ROOT/cheng-package.toml" 2>/dev/null || true; } | sha256_stream)"
+  BUILD_KEY="$(printf '%s %s %s\n' "$source_key" "$package_key" "$(toolchain_identity)" | sha256_stream | cut -c1-24)"
+  cached_bin="$BUILD_CACHE_DIR/$BUILD_KEY/$OUT_NAME"
+  if [ -x "$cached_bin" ]; then
+    mkdir -p "$OUT_DIR"
+    # Fresh inode, as below; the cached copy is already signed and version-probed.
+    rm -f "$OUT_DIR/$OUT_NAME"
+    cp -p "$cached_bin" "$OUT_DIR/$OUT_NAME"
+    touch "$BUILD_CACHE_DIR/$BUILD_KEY"
+    echo "[cheng-codex] build cache hit ($BUILD_KEY): $OUT_DIR/$OUT_NAME"
+    exit 0
+  fi
+fi
+
+store_build_cache() {
+  if [ -z "$BUILD_KEY" ]; then
+    return
+  fi
+  local entry="$BUILD_CACHE_DIR/$BUILD_KEY"
+  local staging="$BUILD_CACHE_DIR/.staging.$$"
+  rm -rf "$staging"
+  mkdir -p "$staging"
+  cp -p "$OUT_DIR/$OUT_NAME" "$staging/$OUT_NAME"
+  rm -rf "$entry"
+  mv "$staging" "$entry"
+  # Keep only the most recently used entries.
+  ls -1t "$BUILD_CACHE_DIR" 2>/dev/null | tail -n +"$((BUILD_CACHE_KEEP + 1))" | while IFS= read -r stale; do
+    rm -rf "${BUILD_CACHE_DIR:?}/$stale"
+  done
+}
+
 if [ ! -f "$SRC" ]; then
   echo "[cheng-codex] source not found: $SRC" 1>&2
   exit 1
@@ -417,5 +504,6 @@ if [ -n "$BUILT_BIN" ] && [ -f "$BUILT_BIN" ]; then
     exit 1
   fi
   rm -f "$version_probe_log"
+  store_build_cache
   echo "[cheng-codex] built: $OUT_DIR/$OUT_NAME"
 fi
@@ -10,7 +10,7 @@ contract_file="${codex_dir}/CONTRACT.md"
 acceptance_file="${codex_dir}/ACCEPTANCE.md"
 matrix_file="${codex_dir}/TASK_MATRIX.yaml"
 
-report_dir="${codex_dir}/build/closed-loop"
+report_dir="${CODEX_CLOSED_LOOP_REPORT_DIR:-${codex_dir}/build/closed-loop}"
 report_tsv="${report_dir}/report.tsv"
 report_txt="${report_dir}/report.txt"
 report_json="${report_dir}/report.json"
@@ -34,6 +34,7 @@ Checks:
   debug         Run debug command surface smoke check (offline)
   mcp           Run mcp add/list/get/remove smoke checks (offline)
   mcp-server    Run mcp-server initialize smoke check (offline)
+  exec-mock     Run exec against the local mock model (offline)
   login-smoke   Run login smoke check (online)
   exec-smoke    Run exec smoke check (online)
 
@@ -42,6 +43,14 @@ Env:
   CODEX_CHENG_BIN=<path>        Override codex-cheng binary path
   CODEX_RS_DIR=<path>           Override codex-rs workspace path for parity checks
   CODEX_RS_BIN=<path>           Override codex-rs binary path for parity checks
+  CODEX_CLOSED_LOOP_REPORT_DIR=<dir>
+                                Write report.{tsv,txt,json} to <dir> (default build/closed-loop)
+  CODEX_PARITY_JOBS=<n>         Run up to n parity cases concurrently (default 1)
+  CODEX_PARITY_CHANGED_SINCE=<rev>
+                                Run only parity cases affected by changes since <rev>
+  CODEX_PARITY_SHARD=<i/n>      Run only parity shard i of n (round-robin unless timings are shared)
+  CODEX_PARITY_SHARD_TIMINGS=<report.json>
+                                Shared report (e.g. merged) whose case durations balance the shards
 USAGE
 }
 
@@ -226,12 +235,28 @@ PY
     python3 tooling/parity/check_hard_gate.py \
       --cheng-root "$codex_dir"
   )
+  changed_args=""
+  if [ -n "${CODEX_PARITY_CHANGED_SINCE:-}" ]; then
+    changed_args="--changed-since=$CODEX_PARITY_CHANGED_SINCE"
+  fi
+  shard_args=""
+  if [ -n "${CODEX_PARITY_SHARD:-}" ]; then
+    shard_args="--shard=$CODEX_PARITY_SHARD"
+  fi
+  timings_args=""
+  if [ -n "${CODEX_PARITY_SHARD_TIMINGS:-}" ]; then
+    timings_args="--shard-timings=$CODEX_PARITY_SHARD_TIMINGS"
+  fi
   (
     cd "$codex_dir" && \
     python3 tooling/parity/run_parity.py \
       --codex-rs-dir "$rs_dir" \
       --cheng-root "$codex_dir" \
-      --cheng-bin "$bin"
+      --cheng-bin "$bin" \
+      --jobs "${CODEX_PARITY_JOBS:-1}" \
+      ${changed_args:+"$changed_args"} \
+      ${shard_args:+"$shard_args"} \
+      ${timings_args:+"$timings_args"}
   )
 }
 
@@ -377,6 +402,46 @@ check_login_smoke() {
   (cd "$codex_dir" && sh ./tooling/login_smoke.sh)
 }
 
+check_exec_mock() {
+  local bin
+  if ! bin=$(resolve_codex_bin); then
+    echo "codex-cheng binary not found" 1>&2
+    return 2
+  fi
+  local tmp_dir
+  tmp_dir=$(mktemp -d)
+  local url_file="${tmp_dir}/mock_url"
+  python3 "${script_dir}/parity/mock_model.py" --url-file "$url_file" --reply "OK" --tokens-per-sec 200 > /dev/null &
+  local mock_pid=$!
+  local tries=0
+  while [ ! -s "$url_file" ] && [ "$tries" -lt 50 ]; do
+    sleep 0.1
+    tries=$((tries + 1))
+  done
+  local status=0
+  if [ ! -s "$url_file" ]; then
+    echo "mock model did not start" 1>&2
+    status=2
+  else
+    local url
+    url=$(cat "$url_file")
+    local last_msg="${tmp_dir}/last_message.txt"
+    mkdir -p "${tmp_dir}/home" "${tmp_dir}/work"
+    if ! (cd "${tmp_dir}/work" && HOME="${tmp_dir}/home" CODEX_BASE_URL="$url" OPENAI_BASE_URL="$url" \
+      CODEX_API_KEY="sk-closed-loop-mock" "$bin" exec --skip-git-repo-check --json \
+      --output-last-message "$last_msg" "Say OK." > /dev/null); then
+      status=1
+    elif ! grep -q "OK" "$last_msg"; then
+      echo "exec last message missing mock reply" 1>&2
+      status=1
+    fi
+  fi
+  kill "$mock_pid" 2>/dev/null
+  wait "$mock_pid" 2>/dev/null
+  rm -rf "$tmp_dir"
+  return "$status"
+}
+
 check_exec_smoke() {
   local bin
   if ! bin=$(resolve_codex_bin); then
@@ -404,6 +469,7 @@ run_selected() {
     debug) run_step "debug" check_debug_surface ;;
     mcp) run_step "mcp" check_mcp_surface ;;
     mcp-server) run_step "mcp-server" check_mcp_server_surface ;;
+    exec-mock) run_step "exec-mock" check_exec_mock ;;
     login-smoke) run_step "login-smoke" check_login_smoke ;;
     exec-smoke) run_step "exec-smoke" check_exec_smoke ;;
     *)
@@ -429,6 +495,7 @@ else
   run_selected debug
   run_selected mcp
   run_selected mcp-server
+  run_selected exec-mock
   if [ "${CODEX_CHENG_ONLINE:-}" = "1" ]; then
     run_selected login-smoke
     run_selected exec-smoke
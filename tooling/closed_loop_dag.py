@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""Run the TASK_MATRIX.yaml done_checks as a dependency graph.
+
+Each cell runs once every cell in its `depends_on` is green; its `done_checks` run in
+parallel (up to --jobs), and a command shared by several cells runs only once. A bare
+`tooling/closed_loop.sh` done_check stands for its `--check` steps and is expanded into
+them, so the full gate is green once those checks are. Checks that share files
+(`parity` and `hard-gate`) never overlap. A cell whose `touch_scope` (and upstream
+cells) hashes the same as at its last green run is skipped. Reports go to the same `build/closed-loop/report.{tsv,txt,json}` files as
+`tooling/closed_loop.sh`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+MANIFEST_VERSION = 1
+CHECK_RE = re.compile(r"--check\s+(\S+)")
+# Checks that only inspect the tree; every other check exercises the built binary and
+# waits for a `build` check scheduled in the same run, as in the sequential script.
+SOURCE_ONLY_CHECKS = {"preflight", "build", "hard-gate"}
+# Checks that must not overlap: parity regenerates parity_manifest.yaml and
+# coverage_table.md (generate_manifest.py) while hard-gate reads them.
+CONFLICTING_CHECKS = {"parity": {"hard-gate"}, "hard-gate": {"parity"}}
+ONLINE_CHECKS = {"login-smoke", "exec-smoke"}
+FULL_GATE_STEP_RE = re.compile(r"^\s*run_selected ([a-z][a-z0-9-]*)\s*$", re.MULTILINE)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run TASK_MATRIX.yaml done_checks as a DAG")
+    parser.add_argument("--root", default="", help="cheng-codex root (default: parent of tooling/)")
+    parser.add_argument("--matrix", default="TASK_MATRIX.yaml", help="Task matrix path")
+    parser.add_argument("--report-dir", default="build/closed-loop", help="Report output directory")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Run up to N done_checks concurrently",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run every cell, even when its touch_scope is unchanged since the last green run",
+    )
+    return parser.parse_args()
+
+
+def parse_scalar(text: str) -> Any:
+    text = text.strip()
+    if text == "[]":
+        return []
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    if text.isdigit():
+        return int(text)
+    return text
+
+
+def load_task_matrix(path: Path) -> dict[str, Any]:
+    """Parse the block-style YAML subset TASK_MATRIX.yaml is written in.
+
+    Supported: top-level `key: scalar`, `key:` followed by `- item` lists, and lists of
+    mappings (`- id: x`) whose values are scalars or nested `- item` lists.
+    """
+    doc: dict[str, Any] = {}
+    top_key = ""
+    item: dict[str, Any] | None = None
+    item_key = ""
+    item_indent = 0
+    for lineno, raw in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        if not raw.strip() or raw.lstrip().startswith("#"):
+            continue
+        indent = len(raw) - len(raw.lstrip(" "))
+        line = raw.strip()
+        if indent == 0:
+            key, _, value = line.partition(":")
+            top_key = key.strip()
+            item = None
+            doc[top_key] = parse_scalar(value) if value.strip() else []
+            continue
+        if line.startswith("- ") and (item is None or indent < item_indent):
+            entry = line[2:]
+            if ":" in entry and not entry.startswith(("'", '"')):
+                key, _, value = entry.partition(":")
+                item = {key.strip(): parse_scalar(value)}
+                item_indent = indent + 2
+                item_key = ""
+                doc[top_key].append(item)
+            else:
+                item = None
+                doc[top_key].append(parse_scalar(entry))
+            continue
+        if item is None:
+            raise ValueError(f"{path}:{lineno}: unsupported YAML construct")
+        if line.startswith("- "):
+            if not item_key or not isinstance(item.get(item_key), list):
+                raise ValueError(f"{path}:{lineno}: list item outside a list")
+            item[item_key].append(parse_scalar(line[2:]))
+            continue
+        key, _, value = line.partition(":")
+        item_key = key.strip()
+        item[item_key] = parse_scalar(value) if value.strip() else []
+    return doc
+
+
+def check_name(command: str) -> str:
+    match = CHECK_RE.search(command)
+    if match:
+        return match.group(1)
+    # A bare `./tooling/closed_loop.sh` is the full sequential gate.
+    parts = command.split()
+    return Path(parts[0]).stem if parts else command
+
+
+def full_gate_checks(root: Path) -> list[str]:
+    """The `--check` steps a bare `tooling/closed_loop.sh` runs, in script order.
+
+    Online checks are included only with CODEX_CHENG_ONLINE=1, as in the script.
+    """
+    text = (root / "tooling" / "closed_loop.sh").read_text(encoding="utf-8")
+    online = os.environ.get("CODEX_CHENG_ONLINE", "") == "1"
+    names: list[str] = []
+    for name in FULL_GATE_STEP_RE.findall(text):
+        if name not in names and (online or name not in ONLINE_CHECKS):
+            names.append(name)
+    return names
+
+
+def expand_full_gate(cells: list[dict[str, Any]], gate_checks: list[str]) -> None:
+    """Replace bare `closed_loop.sh` done_checks with one `--check` command per step."""
+    for cell in cells:
+        expanded: list[str] = []
+        for command in cell.get("done_checks", []):
+            parts = command.split()
+            if check_name(command) != "closed_loop" or len(parts) != 1:
+                expanded.append(command)
+                continue
+            for name in gate_checks:
+                step = f"{parts[0]} --check {name}"
+                if step not in expanded:
+                    expanded.append(step)
+        cell["done_checks"] = expanded
+
+
+def scope_digest(root: Path, scope: list[str]) -> str:
+    """Hash the paths and contents of every file under the `touch_scope` entries."""
+    digest = hashlib.sha256()
+    for entry in sorted(scope):
+        base = root / entry
+        if base.is_dir():
+            files = sorted(
+                Path(dirpath) / name
+                for dirpath, dirnames, filenames in os.walk(base)
+                if "__pycache__" not in Path(dirpath).parts
+                for name in filenames
+            )
+        elif base.is_file():
+            files = [base]
+        else:
+            digest.update(f"missing:{entry}\0".encode("utf-8"))
+            continue
+        for path in files:
+            digest.update(path.relative_to(root).as_posix().encode("utf-8") + b"\0")
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def cell_keys(root: Path, cells: list[dict[str, Any]]) -> dict[str, str]:
+    """Key each cell by its own touch_scope, its done_checks and its upstream cell keys."""
+    by_id = {cell["id"]: cell for cell in cells}
+    keys: dict[str, str] = {}
+
+    def key_for(cell_id: str, stack: tuple[str, ...]) -> str:
+        if cell_id in keys:
+            return keys[cell_id]
+        if cell_id in stack:
+            raise ValueError(f"dependency cycle: {' -> '.join(stack + (cell_id,))}")
+        cell = by_id[cell_id]
+        digest = hashlib.sha256()
+        digest.update(scope_digest(root, cell.get("touch_scope", [])).encode("utf-8"))
+        digest.update(json.dumps(cell.get("done_checks", [])).encode("utf-8"))
+        for dep in sorted(cell.get("depends_on", [])):
+            digest.update(key_for(dep, stack + (cell_id,)).encode("utf-8"))
+        keys[cell_id] = digest.hexdigest()
+        return keys[cell_id]
+
+    for cell in cells:
+        key_for(cell["id"], ())
+    return keys
+
+
+def load_manifest(path: Path) -> dict[str, str]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    cells = data.get("cells", {})
+    return cells if isinstance(cells, dict) else {}
+
+
+def save_manifest(path: Path, cells: dict[str, str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "cells": cells}, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def run_command(root: Path, command: str, log_path: Path) -> dict[str, Any]:
+    name = check_name(command)
+    if name in ONLINE_CHECKS and os.environ.get("CODEX_CHENG_ONLINE", "") != "1":
+        return {"status": "skip", "exit_code": 0, "reason": "CODEX_CHENG_ONLINE not set", "duration_ms": 0}
+    # Each check writes its own closed_loop.sh report into a scratch dir so parallel
+    # checks never truncate the shared build/closed-loop/report.tsv.
+    scratch = tempfile.mkdtemp(prefix=f"closed-loop-{name}-")
+    env = dict(os.environ)
+    env["CODEX_CLOSED_LOOP_REPORT_DIR"] = scratch
+    started = time.monotonic()
+    print(f"==> {name}: {command}", flush=True)
+    with log_path.open("w", encoding="utf-8") as log:
+        proc = subprocess.run(command, shell=True, cwd=str(root), env=env, stdout=log, stderr=subprocess.STDOUT, check=False)
+    shutil.rmtree(scratch, ignore_errors=True)
+    status = "ok" if proc.returncode == 0 else "fail"
+    print(f"<== {name}: {status} ({proc.returncode})", flush=True)
+    return {
+        "status": status,
+        "exit_code": proc.returncode,
+        "duration_ms": int((time.monotonic() - started) * 1000),
+        "log": str(log_path),
+    }
+
+
+def main() -> int:
+    args = parse_args()
+    root = Path(args.root).resolve() if args.root else Path(__file__).resolve().parent.parent
+    matrix_path = Path(args.matrix)
+    if not matrix_path.is_absolute():
+        matrix_path = root / matrix_path
+    report_dir = Path(args.report_dir)
+    if not report_dir.is_absolute():
+        report_dir = root / report_dir
+    log_dir = report_dir / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = report_dir / "touch_scope.json"
+
+    matrix = load_task_matrix(matrix_path)
+    cells = [cell for cell in matrix.get("cells", []) if isinstance(cell, dict) and cell.get("id")]
+    by_id = {cell["id"]: cell for cell in cells}
+    for cell in cells:
+        for dep in cell.get("depends_on", []):
+            if dep not in by_id:
+                print(f"{cell['id']}: unknown dependency {dep}", file=sys.stderr)
+                return 2
+    expand_full_gate(cells, full_gate_checks(root))
+    keys = cell_keys(root, cells)
+    green = {} if args.force else load_manifest(manifest_path)
+
+    # Commands in first-appearance order; this is also the report row order.
+    commands: list[str] = []
+    for cell in cells:
+        for command in cell.get("done_checks", []):
+            if command not in commands:
+                commands.append(command)
+    build_commands = [c for c in commands if check_name(c) == "build"]
+
+    cell_status: dict[str, str] = {}
+    cell_reason: dict[str, str] = {}
+    for cell in cells:
+        if green.get(cell["id"]) == keys[cell["id"]]:
+            cell_status[cell["id"]] = "unchanged"
+            cell_reason[cell["id"]] = "touch_scope unchanged since last green run"
+
+    results: dict[str, dict[str, Any]] = {}
+    futures: dict[concurrent.futures.Future[dict[str, Any]], str] = {}
+    wanted: set[str] = set()
+    started = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, int(args.jobs))) as pool:
+        while True:
+            progressed = True
+            while progressed:
+                progressed = False
+                for cell in cells:
+                    cell_id = cell["id"]
+                    if cell_id in cell_status:
+                        continue
+                    deps = cell.get("depends_on", [])
+                    failed = [d for d in deps if cell_status.get(d) in ("fail", "blocked")]
+                    if failed:
+                        cell_status[cell_id] = "blocked"
+                        cell_reason[cell_id] = f"dependency failed: {', '.join(failed)}"
+                        progressed = True
+                        continue
+                    if any(d not in cell_status for d in deps):
+                        continue
+                    checks = cell.get("done_checks", [])
+                    wanted.update(checks)
+                    cmd_results = [results.get(c) for c in checks]
+                    if all(r is not None for r in cmd_results):
+                        bad = [c for c, r in zip(checks, cmd_results) if r["status"] == "fail"]
+                        skipped = [c for c, r in zip(checks, cmd_results) if r["status"] == "skip"]
+                        if bad:
+                            cell_status[cell_id] = "fail"
+                            cell_reason[cell_id] = f"failed: {', '.join(check_name(c) for c in bad)}"
+                        elif skipped:
+                            # Skipped checks do not block dependents, but the cell is not green.
+                            cell_status[cell_id] = "skip"
+                            cell_reason[cell_id] = f"skipped: {', '.join(check_name(c) for c in skipped)}"
+                        else:
+                            cell_status[cell_id] = "ok"
+                        progressed = True
+            running = set(futures.values())
+            for command in commands:
+                if command not in wanted or command in results or command in running:
+                    continue
+                name = check_name(command)
+                if name not in SOURCE_ONLY_CHECKS and any(b in wanted and b not in results for b in build_commands):
+                    continue
+                running_names = {check_name(c) for c in running}
+                if running_names & CONFLICTING_CHECKS.get(name, set()):
+                    continue
+                log_path = log_dir / (re.sub(r"[^A-Za-z0-9_.-]+", "_", name) + ".log")
+                futures[pool.submit(run_command, root, command, log_path)] = command
+                running.add(command)
+            if not futures:
+                break
+            done, _pending = concurrent.futures.wait(list(futures), return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                results[futures.pop(future)] = future.result()
+
+    for cell in cells:
+        cell_status.setdefault(cell["id"], "blocked")
+        if cell_status[cell["id"]] == "ok":
+            green[cell["id"]] = keys[cell["id"]]
+        elif cell_status[cell["id"]] != "unchanged":
+            green.pop(cell["id"], None)
+    save_manifest(manifest_path, green)
+
+    rows: list[dict[str, Any]] = []
+    for command in commands:
+        result = results.get(command)
+        if result is None:
+            users = [c["id"] for c in cells if command in c.get("done_checks", [])]
+            reason = "; ".join(f"{u}: {cell_reason.get(u, cell_status[u])}" for u in users)
+            result = {"status": "skip", "exit_code": 0, "reason": reason}
+        rows.append({"name": check_name(command), "command": command, **result})
+
+    report_tsv = report_dir / "report.tsv"
+    with report_tsv.open("w", encoding="utf-8") as f:
+        for row in rows:
+            detail = row["command"] if row["status"] != "skip" else row.get("reason", "")
+            f.write(f"{row['name']}\t{row['status']}\t{row['exit_code']}\t{detail}\n")
+
+    result = "fail" if any(row["status"] == "fail" for row in rows) else "pass"
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "steps": [
+            {
+                "name": row["name"],
+                "status": row["status"],
+                "exit_code": row["exit_code"],
+                "command": row["command"] if row["status"] != "skip" else row.get("reason", ""),
+                "duration_ms": row.get("duration_ms", 0),
+            }
+            for row in rows
+        ],
+        "cells": [
+            {
+                "id": cell["id"],
+                "status": cell_status[cell["id"]],
+                "reason": cell_reason.get(cell["id"], ""),
+                "depends_on": cell.get("depends_on", []),
+                "done_checks": cell.get("done_checks", []),
+            }
+            for cell in cells
+        ],
+        "jobs": max(1, int(args.jobs)),
+        "wall_ms": int((time.monotonic() - started) * 1000),
+        "result": result,
+    }
+    report_json = report_dir / "report.json"
+    report_json.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    counts: dict[str, int] = {}
+    for cell in cells:
+        counts[cell_status[cell["id"]]] = counts.get(cell_status[cell["id"]], 0) + 1
+    cell_note = ", ".join(f"{status}={count}" for status, count in sorted(counts.items()))
+    (report_dir / "report.txt").write_text(
+        "\n".join(
+            [
+                "Closed loop report",
+                f"- result: {result}",
+                f"- cells: {cell_note}",
+                f"- wall_ms: {report['wall_ms']}",
+                f"- report.tsv: {report_tsv}",
+                f"- report.json: {report_json}",
+            ]
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+    return 1 if result == "fail" else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
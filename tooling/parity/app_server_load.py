@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""Concurrent JSON-RPC load generator for `app-server`.
+
+Each session runs `thread/start`, a number of `turn/start` round trips (waiting for the
+streamed `item/*` notifications and `turn/completed`), then `fuzzyFileSearch`. Sessions
+run either one per server process or all multiplexed over a single process's stdio,
+against the offline mock model from `mock_model.py`. The sweep reports requests/sec,
+time-to-first-notification and turn latency percentiles per session count.
+
+With `--blocks K`, each level also splits every session's turns into K consecutive
+blocks and reports the median turn latency per block, so a long single-session run
+(`--sessions 1 --turns 10000`) shows whether per-turn cost grows with the rollout size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import itertools
+import json
+from pathlib import Path
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any
+
+from mock_model import MockModelServer
+from run_parity import (
+    PROTOCOL_EXIT_GRACE_SEC,
+    ProtocolSession,
+    detect_cheng_bin,
+    isolated_host_env,
+    latency_summary,
+)
+
+LAYOUTS = ("process", "shared")
+MAX_REPORTED_ERRORS = 20
+# Rollout roots: `sessions/` for codex-rs, `threads/` for cheng-codex.
+ROLLOUT_DIRS = ("sessions", "threads")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Drive concurrent app-server sessions and report latency")
+    parser.add_argument("--cheng-root", default=".", help="Path to cheng-codex repo root")
+    parser.add_argument("--cheng-bin", default="", help="Path to built cheng-codex binary")
+    parser.add_argument("--codex-rs-bin", default="", help="Also sweep this codex-rs binary for comparison")
+    parser.add_argument("--sessions", default="1,2,4,8", help="Comma-separated concurrent session counts")
+    parser.add_argument(
+        "--layout",
+        choices=LAYOUTS,
+        default="process",
+        help="process: one app-server per session; shared: all sessions on one app-server stdio",
+    )
+    parser.add_argument("--turns", type=int, default=3, help="turn/start round trips per session")
+    parser.add_argument(
+        "--blocks",
+        type=int,
+        default=0,
+        help="Report median turn latency over this many consecutive blocks of each session's turns",
+    )
+    parser.add_argument("--prompt", default="Say hello.", help="Text input sent with every turn")
+    parser.add_argument("--search-query", default="main", help="fuzzyFileSearch query")
+    parser.add_argument("--search-root", default="", help="fuzzyFileSearch root (default: cheng root)")
+    parser.add_argument("--timeout-sec", type=float, default=60.0, help="Per-request / per-turn timeout")
+    parser.add_argument("--base-url", default="", help="Use this model endpoint instead of the built-in mock")
+    parser.add_argument(
+        "--mock-config",
+        default="",
+        help='JSON behavior for the built-in mock (mock_model.DEFAULT_CONFIG keys, e.g. {"tokens_per_sec": 50})',
+    )
+    parser.add_argument("--out-json", default="build/parity/app_server_load.json", help="Output report JSON path")
+    return parser.parse_args()
+
+
+def parse_counts(text: str) -> list[int]:
+    counts = [int(part) for part in text.split(",") if part.strip()]
+    if not counts or any(count < 1 for count in counts):
+        raise ValueError(f"invalid --sessions {text!r}")
+    return counts
+
+
+def thread_of(message: dict[str, Any]) -> str:
+    params = message.get("params")
+    if not isinstance(params, dict):
+        return ""
+    thread_id = params.get("threadId")
+    if isinstance(thread_id, str):
+        return thread_id
+    thread = params.get("thread")
+    if isinstance(thread, dict) and isinstance(thread.get("id"), str):
+        return thread["id"]
+    return ""
+
+
+class LoadServer:
+    """One app-server process; sessions share it in the `shared` layout."""
+
+    def __init__(self, cmd: list[str], cwd: Path, env: dict[str, str]) -> None:
+        self.home = env["HOME"]
+        self.ids = itertools.count(1)
+        proc = subprocess.Popen(
+            [*cmd, "app-server"],
+            cwd=str(cwd),
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        self.session = ProtocolSession(proc)
+        self.send_lock = threading.Lock()
+
+    def request(self, method: str, params: dict[str, Any], timeout_sec: float) -> tuple[float, dict[str, Any] | None]:
+        """Send a request and wait for its response; returns (send time, response record)."""
+        req_id = next(self.ids)
+        with self.send_lock:
+            sent = self.session.send({"jsonrpc": "2.0", "id": req_id, "method": method, "params": params})
+        record = self.session.take(
+            lambda m: m.get("id") == req_id and "method" not in m,
+            sent,
+            sent + timeout_sec,
+        )
+        return sent, record
+
+    def initialize(self, timeout_sec: float) -> None:
+        params = {"clientInfo": {"name": "app-server-load", "title": "app-server-load", "version": "1.0"}}
+        _sent, record = self.request("initialize", params, timeout_sec)
+        if record is None or "error" in record["message"]:
+            raise RuntimeError(f"initialize failed: {self.stderr_tail()}")
+        with self.send_lock:
+            self.session.send({"jsonrpc": "2.0", "method": "initialized"})
+
+    def stderr_tail(self) -> str:
+        return "".join(self.session.stderr_parts)[-400:].strip()
+
+    def rollout_events(self) -> int:
+        """Lines across the `.jsonl` rollouts under the server's codex home.
+
+        Only the rollout trees are counted, not side files such as `thread_index.jsonl`.
+        """
+        total = 0
+        codex_home = Path(self.home) / ".codex"
+        for subdir in ROLLOUT_DIRS:
+            for path in (codex_home / subdir).rglob("*.jsonl"):
+                with path.open("rb") as handle:
+                    total += sum(1 for _line in handle)
+        return total
+
+    def close(self) -> int:
+        """Stop the server and drop its home; returns the rollout event count it left."""
+        proc = self.session.proc
+        if proc.stdin is not None:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+        try:
+            proc.wait(timeout=PROTOCOL_EXIT_GRACE_SEC)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        for reader in self.session.readers:
+            reader.join(timeout=1)
+        events = self.rollout_events()
+        shutil.rmtree(self.home, ignore_errors=True)
+        return events
+
+
+def drive_session(server: LoadServer, workspace: Path, args: argparse.Namespace, barrier: threading.Barrier) -> dict[str, Any]:
+    out: dict[str, Any] = {
+        "requests": 0,
+        "turn_ms": [],
+        "ttfn_ms": [],
+        "ttft_ms": [],
+        "search_ms": [],
+        "notifications": 0,
+        "item_notifications": 0,
+        "errors": [],
+    }
+    barrier.wait()
+    try:
+        _sent, record = server.request("thread/start", {"cwd": str(workspace)}, args.timeout_sec)
+        if record is None or "error" in record["message"]:
+            out["errors"].append(f"thread/start: {record['message'].get('error') if record else 'timeout'}")
+            return out
+        out["requests"] += 1
+        thread_id = record["message"].get("result", {}).get("thread", {}).get("id", "")
+        server.session.claim_all(lambda m: "id" not in m and thread_of(m) == thread_id)
+
+        for _turn in range(args.turns):
+            params = {"threadId": thread_id, "input": [{"type": "text", "text": args.prompt}]}
+            sent, record = server.request("turn/start", params, args.timeout_sec)
+            if record is None or "error" in record["message"]:
+                out["errors"].append(f"turn/start: {record['message'].get('error') if record else 'timeout'}")
+                break
+            out["requests"] += 1
+            done = server.session.take(
+                lambda m: m.get("method") == "turn/completed" and thread_of(m) == thread_id,
+                sent,
+                sent + args.timeout_sec,
+            )
+            notes = server.session.claim_all(lambda m: "id" not in m and thread_of(m) == thread_id)
+            if done is None:
+                out["errors"].append("turn/completed: timeout")
+                break
+            status = done["message"].get("params", {}).get("turn", {}).get("status", "")
+            if status != "completed":
+                out["errors"].append(f"turn/completed: status {status!r}")
+            out["turn_ms"].append(round((done["at"] - sent) * 1000, 3))
+            out["ttfn_ms"].append(round((min(r["at"] for r in notes) - sent) * 1000, 3))
+            deltas = [r["at"] for r in notes if r["message"].get("method") == "item/agentMessage/delta"]
+            if deltas:
+                out["ttft_ms"].append(round((min(deltas) - sent) * 1000, 3))
+            out["notifications"] += len(notes)
+            out["item_notifications"] += sum(1 for r in notes if str(r["message"].get("method", "")).startswith("item/"))
+
+        search = {"query": args.search_query, "roots": [args.search_root]}
+        sent, record = server.request("fuzzyFileSearch", search, args.timeout_sec)
+        if record is None or "error" in record["message"]:
+            out["errors"].append(f"fuzzyFileSearch: {record['message'].get('error') if record else 'timeout'}")
+        else:
+            out["requests"] += 1
+            out["search_ms"].append(round((record["at"] - sent) * 1000, 3))
+    except (BrokenPipeError, OSError) as exc:
+        out["errors"].append(f"server closed stdin: {exc}")
+    finally:
+        out["done_at"] = time.monotonic()
+    return out
+
+
+def run_level(
+    target: str,
+    cmd: list[str],
+    count: int,
+    args: argparse.Namespace,
+    base_url: str,
+    mock: MockModelServer | None,
+) -> dict[str, Any]:
+    workspace = Path(tempfile.mkdtemp(prefix="codex-load-ws-"))
+    servers: list[LoadServer] = []
+    results: list[dict[str, Any]] = [{} for _ in range(count)]
+    startup_ms: list[float] = []
+    rollout_events = 0
+    try:
+        for _idx in range(count if args.layout == "process" else 1):
+            env = isolated_host_env("codex-load-home-")
+            env["CODEX_BASE_URL"] = base_url
+            env["OPENAI_BASE_URL"] = base_url
+            env.setdefault("CODEX_API_KEY", "sk-load-mock")
+            env.setdefault("OPENAI_API_KEY", "sk-load-mock")
+            started = time.monotonic()
+            server = LoadServer(cmd, workspace, env)
+            servers.append(server)
+            server.initialize(args.timeout_sec)
+            startup_ms.append(round((time.monotonic() - started) * 1000, 3))
+
+        # Every session blocks on the barrier so the measured window starts together.
+        barrier = threading.Barrier(count + 1)
+
+        def worker(idx: int) -> None:
+            results[idx] = drive_session(servers[idx % len(servers)], workspace, args, barrier)
+
+        threads = [threading.Thread(target=worker, args=(idx,), daemon=True) for idx in range(count)]
+        for thread in threads:
+            thread.start()
+        model_before = mock.requests if mock is not None else 0
+        barrier.wait()
+        window_start = time.monotonic()
+        for thread in threads:
+            thread.join()
+        model_requests = (mock.requests - model_before) if mock is not None else None
+    finally:
+        for server in servers:
+            rollout_events += server.close()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    wall_sec = max(max(r.get("done_at", window_start) for r in results) - window_start, 1e-9)
+    requests = sum(r.get("requests", 0) for r in results)
+    turn_ms = [v for r in results for v in r.get("turn_ms", [])]
+    errors = [e for r in results for e in r.get("errors", [])]
+    return {
+        "target": target,
+        "sessions": count,
+        "layout": args.layout,
+        "processes": len(servers),
+        "startup_ms": latency_summary(startup_ms),
+        "wall_ms": round(wall_sec * 1000, 3),
+        "requests": requests,
+        "requests_per_sec": round(requests / wall_sec, 3),
+        "turns": len(turn_ms),
+        "turns_per_sec": round(len(turn_ms) / wall_sec, 3),
+        "ttfn_ms": latency_summary([v for r in results for v in r.get("ttfn_ms", [])]),
+        "ttft_ms": latency_summary([v for r in results for v in r.get("ttft_ms", [])]),
+        "turn_ms": latency_summary(turn_ms),
+        "search_ms": latency_summary([v for r in results for v in r.get("search_ms", [])]),
+        "notifications": sum(r.get("notifications", 0) for r in results),
+        "item_notifications": sum(r.get("item_notifications", 0) for r in results),
+        "model_requests": model_requests,
+        "rollout_events": rollout_events,
+        "error_count": len(errors),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+        "turn_blocks": block_medians([r.get("turn_ms", []) for r in results], args.blocks) if args.blocks > 0 else None,
+    }
+
+
+def block_medians(series: list[list[float]], blocks: int) -> dict[str, Any]:
+    """Median turn latency per consecutive block of turns, pooled across sessions."""
+    pooled: list[list[float]] = [[] for _ in range(blocks)]
+    for turns in series:
+        if not turns:
+            continue
+        for idx, value in enumerate(turns):
+            pooled[min(idx * blocks // len(turns), blocks - 1)].append(value)
+    medians = [latency_summary(values)["p50"] for values in pooled]
+    first, last = medians[0], medians[-1]
+    return {
+        "blocks": blocks,
+        "turns_per_block": max(len(turns) for turns in series) // blocks if series else 0,
+        "p50_ms": medians,
+        "growth": round(last / first, 3) if first else 0.0,
+    }
+
+
+def add_scaling(levels: list[dict[str, Any]]) -> None:
+    """Annotate each level with throughput relative to perfect scaling from its smallest level."""
+    base = levels[0]
+    per_session = base["requests_per_sec"] / base["sessions"] if base["sessions"] else 0
+    for level in levels:
+        ideal = per_session * level["sessions"]
+        level["scaling"] = round(level["requests_per_sec"] / ideal, 3) if ideal > 0 else 0.0
+
+
+def format_level(level: dict[str, Any]) -> str:
+    line = (
+        f"{level['target']:<9} sessions={level['sessions']:<4} rps={level['requests_per_sec']:<9} "
+        f"scaling={level.get('scaling', 0):<6} ttfn_p50={level['ttfn_ms']['p50']}ms "
+        f"ttft_p50={level['ttft_ms']['p50']}ms "
+        f"turn_p50={level['turn_ms']['p50']}ms turn_p99={level['turn_ms']['p99']}ms "
+        f"search_p50={level['search_ms']['p50']}ms errors={level['error_count']}"
+    )
+    if level.get("turn_blocks"):
+        line += f" block_growth={level['turn_blocks']['growth']}"
+    return line
+
+
+def main() -> int:
+    args = parse_args()
+    cheng_root = Path(args.cheng_root).resolve()
+    counts = parse_counts(args.sessions)
+    if not args.search_root:
+        args.search_root = str(cheng_root)
+
+    targets: list[tuple[str, list[str]]] = [("cheng", [str(detect_cheng_bin(cheng_root, args.cheng_bin))])]
+    if args.codex_rs_bin:
+        targets.append(("codex-rs", [str(Path(args.codex_rs_bin).resolve())]))
+
+    mock: MockModelServer | None = None
+    base_url = args.base_url
+    if not base_url:
+        try:
+            mock = MockModelServer(config=json.loads(args.mock_config) if args.mock_config else None)
+        except ValueError as exc:
+            print(f"app_server_load: invalid --mock-config: {exc}", file=sys.stderr)
+            return 2
+        base_url = mock.start()
+
+    levels: list[dict[str, Any]] = []
+    try:
+        for target, cmd in targets:
+            target_levels = [run_level(target, cmd, count, args, base_url, mock) for count in counts]
+            add_scaling(target_levels)
+            for level in target_levels:
+                print(format_level(level), flush=True)
+            levels.extend(target_levels)
+    except RuntimeError as exc:
+        print(f"app_server_load: {exc}", file=sys.stderr)
+        return 2
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    report = {
+        "version": 1,
+        "generated_at": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "targets": [{"target": target, "cmd": cmd} for target, cmd in targets],
+        "layout": args.layout,
+        "turns_per_session": args.turns,
+        "blocks": args.blocks,
+        "model_base_url": base_url,
+        "mock_model": mock is not None,
+        "levels": levels,
+    }
+    out_json = Path(args.out_json)
+    if not out_json.is_absolute():
+        out_json = cheng_root / out_json
+    out_json.parent.mkdir(parents=True, exist_ok=True)
+    out_json.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(str(out_json))
+    return 1 if any(level["error_count"] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
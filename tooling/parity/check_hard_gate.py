@@ -13,6 +13,8 @@ from pathlib import Path
 import re
 from typing import Any
 
+from cheng_index import DEFAULT_INDEX_PATH, ChengIndex, parse_entry_ref
+
 
 REQUIRED_BEHAVIOR_IDS = {
     "arg0-argv0-dispatch",
@@ -68,6 +70,13 @@ REQUIRED_SOURCE_SNIPPETS = {
     ],
 }
 
+MAIN_ENTRY = "src/main.cheng::main"
+
+REQUIRED_REACHABLE_FNS = {
+    "src/main.cheng": ["collectArgsFromMain", "dispatchCommand"],
+    "src/config.cheng": ["setConfigOverrides"],
+}
+
 FORBIDDEN_SOURCE_SNIPPETS = {
     "src/config.cheng": [".codex-cheng"],
     "src/auth_store.cheng": [".codex-cheng"],
@@ -345,25 +354,38 @@ def validate(
             f"table={table_scenarized_behaviors} manifest={scenarized_behaviors}"
         )
 
+    # One multi-pattern scan per file, memoized in the source index across runs.
+    source_index = ChengIndex(cheng_root, cheng_root / DEFAULT_INDEX_PATH)
+    required_hits = source_index.scan(REQUIRED_SOURCE_SNIPPETS)
+    forbidden_hits = source_index.scan(FORBIDDEN_SOURCE_SNIPPETS)
+
     for rel, needles in REQUIRED_SOURCE_SNIPPETS.items():
-        file_path = (cheng_root / rel).resolve()
-        if not file_path.exists():
+        found = required_hits.get(rel)
+        if found is None:
             failures.append(f"required source file missing: {rel}")
             continue
-        text = file_path.read_text(encoding="utf-8", errors="ignore")
         for needle in needles:
-            if needle not in text:
+            if needle not in found:
                 failures.append(f"required source snippet missing in {rel}: {needle!r}")
 
     for rel, needles in FORBIDDEN_SOURCE_SNIPPETS.items():
-        file_path = (cheng_root / rel).resolve()
-        if not file_path.exists():
+        found = forbidden_hits.get(rel)
+        if found is None:
             continue
-        text = file_path.read_text(encoding="utf-8", errors="ignore")
         for needle in needles:
-            if needle in text:
+            if needle in found:
                 failures.append(f"forbidden source snippet present in {rel}: {needle!r}")
 
+    entry = parse_entry_ref(MAIN_ENTRY)
+    for rel, names in REQUIRED_REACHABLE_FNS.items():
+        for name in names:
+            if not source_index.has_fn(rel, name):
+                failures.append(f"required fn missing in {rel}: {name}")
+            elif not source_index.reachable(entry, (rel, name)):
+                failures.append(f"required fn {rel}::{name} is not reachable from {MAIN_ENTRY}")
+
+    source_index.save()
+
     return failures
 
 
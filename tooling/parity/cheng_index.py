@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Cached symbol / call-graph index over cheng-codex `src/**/*.cheng`.
+
+The index records, per file: content hash, imports, top-level `fn` definitions with
+line ranges, a rough list of callees per function, and the outcome of every source
+snippet ever checked against that content. Entries are reused while a file's size and
+mtime (or, failing that, its sha256) are unchanged, so warm gates never re-read sources.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import deque
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+import sys
+import threading
+from typing import Any
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_PATH = "build/parity/cheng_index.json"
+
+FN_RE = re.compile(r"^fn\s+([A-Za-z_][A-Za-z0-9_]*)")
+IMPORT_RE = re.compile(r"^import\s+(\S+)")
+CALL_RE = re.compile(r"\b([A-Za-z_][A-Za-z0-9_]*)\s*\(")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build or query the cheng source index")
+    parser.add_argument("--cheng-root", default=".", help="Path to cheng-codex root")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Index cache path")
+    parser.add_argument("--module", default="", help="Module path for --fn (e.g. src/main.cheng)")
+    parser.add_argument("--fn", default="", help="Function name to look up")
+    parser.add_argument(
+        "--reachable-from",
+        default="",
+        help="Report whether --fn is reachable from this entry (module::fn, e.g. src/main.cheng::main)",
+    )
+    return parser.parse_args()
+
+
+def parse_cheng_source(text: str) -> dict[str, Any]:
+    lines = text.splitlines()
+    imports: list[str] = []
+    fns: list[dict[str, Any]] = []
+    current: dict[str, Any] | None = None
+    last_body_line = 0
+
+    def close_current() -> None:
+        if current is not None:
+            current["end"] = max(current["start"], last_body_line)
+            body = "\n".join(lines[current["start"] : current["end"]])
+            calls = sorted({name for name in CALL_RE.findall(body) if name != current["name"]})
+            current["calls"] = calls
+            fns.append(current)
+
+    for lineno, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        top_level = not line[0].isspace() and not line.startswith("#")
+        if top_level:
+            fn_match = FN_RE.match(line)
+            # Multi-line signatures continue with `)` at column 0; they stay in the fn.
+            if fn_match or not line.startswith(")"):
+                close_current()
+                current = None
+            if fn_match:
+                current = {"name": fn_match.group(1), "start": lineno}
+            import_match = IMPORT_RE.match(line)
+            if import_match:
+                imports.append(import_match.group(1))
+        last_body_line = lineno
+    close_current()
+    return {"imports": imports, "fns": fns}
+
+
+def find_all_needles(text: str, needles: list[str]) -> set[str]:
+    """Find which needles occur in `text` with one regex pass.
+
+    A lookahead alternation is tried at every offset and reports the longest needle
+    starting there; any needle contained in a found needle is present as well.
+    """
+    unique = sorted({n for n in needles if n}, key=len, reverse=True)
+    if not unique:
+        return set()
+    pattern = re.compile("(?=(" + "|".join(re.escape(n) for n in unique) + "))")
+    found = {m.group(1) for m in pattern.finditer(text)}
+    for needle in unique:
+        if needle not in found and any(needle in hit for hit in found):
+            found.add(needle)
+    return found
+
+
+class ChengIndex:
+    def __init__(self, cheng_root: Path, index_path: Path | None = None) -> None:
+        self.cheng_root = cheng_root
+        self.index_path = index_path
+        self.files: dict[str, dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+        if index_path is not None and index_path.exists():
+            try:
+                data = json.loads(index_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            if isinstance(data, dict) and data.get("version") == INDEX_VERSION:
+                files = data.get("files", {})
+                if isinstance(files, dict):
+                    self.files = files
+
+    def refresh(self) -> None:
+        """Bring every `src/**/*.cheng` entry up to date and drop deleted files."""
+        src = self.cheng_root / "src"
+        seen: set[str] = set()
+        if src.is_dir():
+            for dirpath, _dirnames, filenames in os.walk(src):
+                for name in filenames:
+                    if name.endswith(".cheng"):
+                        rel = (Path(dirpath) / name).relative_to(self.cheng_root).as_posix()
+                        seen.add(rel)
+                        self.entry(rel)
+        with self.lock:
+            for rel in [r for r in self.files if r not in seen and r.endswith(".cheng")]:
+                del self.files[rel]
+                self.dirty = True
+
+    def entry(self, rel: str) -> dict[str, Any] | None:
+        """Return the up-to-date entry for `rel`, or None when the file does not exist."""
+        path = self.cheng_root / rel
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        with self.lock:
+            cached = self.files.get(rel)
+            if cached and cached.get("size") == st.st_size and cached.get("mtime_ns") == st.st_mtime_ns:
+                return cached
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        with self.lock:
+            cached = self.files.get(rel)
+            if cached and cached.get("sha256") == digest:
+                cached["size"] = st.st_size
+                cached["mtime_ns"] = st.st_mtime_ns
+                self.dirty = True
+                return cached
+            entry: dict[str, Any] = {
+                "sha256": digest,
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "snippets": {},
+            }
+            if rel.endswith(".cheng"):
+                entry.update(parse_cheng_source(data.decode("utf-8", errors="ignore")))
+            self.files[rel] = entry
+            self.dirty = True
+            return entry
+
+    def scan(self, needles_by_file: dict[str, list[str]]) -> dict[str, set[str] | None]:
+        """Return the needles present per file (None for a missing file).
+
+        Results are memoized per file hash; each file is read at most once per call,
+        and only when some needle has not been checked against its current content.
+        """
+        out: dict[str, set[str] | None] = {}
+        for rel, needles in needles_by_file.items():
+            entry = self.entry(rel)
+            if entry is None:
+                out[rel] = None
+                continue
+            with self.lock:
+                known = dict(entry.get("snippets", {}))
+            unknown = [n for n in dict.fromkeys(needles) if n not in known]
+            if unknown:
+                text = (self.cheng_root / rel).read_text(encoding="utf-8", errors="ignore")
+                found = find_all_needles(text, unknown)
+                with self.lock:
+                    snippets = entry.setdefault("snippets", {})
+                    for needle in unknown:
+                        snippets[needle] = needle in found
+                        known[needle] = needle in found
+                    self.dirty = True
+            out[rel] = {n for n in needles if known.get(n)}
+        return out
+
+    def has_fn(self, rel: str, name: str) -> bool:
+        entry = self.entry(rel)
+        if entry is None:
+            return False
+        return any(fn["name"] == name for fn in entry.get("fns", []))
+
+    def definitions(self) -> dict[str, list[str]]:
+        defs: dict[str, list[str]] = {}
+        with self.lock:
+            for rel, entry in sorted(self.files.items()):
+                for fn in entry.get("fns", []):
+                    defs.setdefault(fn["name"], []).append(rel)
+        return defs
+
+    def reachable(self, start: tuple[str, str], target: tuple[str, str]) -> bool:
+        """Breadth-first search over the rough call graph.
+
+        Cheng resolves imported names program-wide, so a callee is bound to the calling
+        module's own definition when there is one, else to every module defining it.
+        """
+        defs = self.definitions()
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            rel, name = queue.popleft()
+            if (rel, name) == target:
+                return True
+            entry = self.entry(rel) or {}
+            for fn in entry.get("fns", []):
+                if fn["name"] != name:
+                    continue
+                for callee in fn.get("calls", []):
+                    owners = defs.get(callee, [])
+                    nodes = [(rel, callee)] if rel in owners else [(owner, callee) for owner in owners]
+                    for node in nodes:
+                        if node not in seen:
+                            seen.add(node)
+                            queue.append(node)
+        return False
+
+    def save(self) -> None:
+        if self.index_path is None or not self.dirty:
+            return
+        with self.lock:
+            payload = json.dumps({"version": INDEX_VERSION, "files": self.files}, sort_keys=True)
+            self.dirty = False
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(self.index_path.name + f".{os.getpid()}.tmp")
+        tmp.write_text(payload + "\n", encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+
+def parse_entry_ref(ref: str) -> tuple[str, str]:
+    module, _, name = ref.partition("::")
+    return module, name
+
+
+def main() -> int:
+    args = parse_args()
+    cheng_root = Path(args.cheng_root).resolve()
+    index_path = Path(args.index)
+    if not index_path.is_absolute():
+        index_path = cheng_root / index_path
+    index = ChengIndex(cheng_root, index_path)
+    index.refresh()
+    index.save()
+
+    if not args.fn:
+        fn_count = sum(len(entry.get("fns", [])) for entry in index.files.values())
+        print(f"{index_path}: {len(index.files)} files, {fn_count} fns")
+        return 0
+
+    if not index.has_fn(args.module, args.fn):
+        print(f"missing: {args.module}::{args.fn}", file=sys.stderr)
+        return 1
+    if args.reachable_from:
+        if not index.reachable(parse_entry_ref(args.reachable_from), (args.module, args.fn)):
+            print(f"unreachable: {args.module}::{args.fn} from {args.reachable_from}", file=sys.stderr)
+            return 1
+    print(f"ok: {args.module}::{args.fn}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
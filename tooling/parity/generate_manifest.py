@@ -7,6 +7,7 @@ The output file uses JSON syntax with a `.yaml` suffix so it is valid YAML.
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import datetime as dt
 import json
 import os
@@ -29,6 +30,17 @@ def parse_args() -> argparse.Namespace:
         default="tooling/parity/parity_manifest.yaml",
         help="Manifest output path",
     )
+    parser.add_argument(
+        "--loc-index",
+        default="build/parity/loc_index.json",
+        help="Sidecar index of per-file line counts (path, size, mtime) reused across runs",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 4,
+        help="Threads used to count changed files",
+    )
     return parser.parse_args()
 
 
@@ -53,35 +65,104 @@ def read_workspace_members(codex_rs_dir: Path) -> list[str]:
         return re.findall(r'"([^"]+)"', block)
 
 
-def count_rs_loc(path: Path) -> int:
-    total = 0
+LOC_INDEX_VERSION = 1
+COUNT_CHUNK_BYTES = 1 << 20
+
+
+def count_lines_fast(path: Path) -> int:
+    """Count lines like iterating a text-mode file (\n, \r\n and lone \r all end a line)."""
+    newlines = 0
+    returns = 0
+    crlf = 0
+    prev_cr = False
+    last = b""
+    with path.open("rb") as fh:
+        while True:
+            chunk = fh.read(COUNT_CHUNK_BYTES)
+            if not chunk:
+                break
+            newlines += chunk.count(b"\n")
+            returns += chunk.count(b"\r")
+            crlf += chunk.count(b"\r\n")
+            if prev_cr and chunk[:1] == b"\n":
+                crlf += 1
+            prev_cr = chunk[-1:] == b"\r"
+            last = chunk[-1:]
+    breaks = newlines + returns - crlf
+    if last and last not in (b"\n", b"\r"):
+        breaks += 1
+    return breaks
+
+
+def walk_files(root: Path, suffix: str) -> list[Path]:
+    if root.is_file():
+        return [root]
+    out: list[Path] = []
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for name in filenames:
+            if name.endswith(suffix):
+                out.append(Path(dirpath) / name)
+    return out
+
+
+def load_loc_index(path: Path) -> dict[str, dict[str, int]]:
     if not path.exists():
-        return 0
-    for rs in path.rglob("*.rs"):
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != LOC_INDEX_VERSION:
+        return {}
+    files = data.get("files", {})
+    return files if isinstance(files, dict) else {}
+
+
+def save_loc_index(path: Path, files: dict[str, dict[str, int]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": LOC_INDEX_VERSION, "files": files}, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def count_loc_indexed(
+    paths: list[Path],
+    index: dict[str, dict[str, int]],
+    jobs: int,
+) -> tuple[dict[str, int], dict[str, dict[str, int]]]:
+    """Return line counts per path and the refreshed index; only changed files are re-read."""
+    fresh: dict[str, dict[str, int]] = {}
+    counts: dict[str, int] = {}
+    stale: list[tuple[str, Path, os.stat_result]] = []
+    for path in paths:
+        key = str(path)
+        if key in fresh:
+            continue
         try:
-            with rs.open("r", encoding="utf-8", errors="ignore") as fh:
-                total += sum(1 for _ in fh)
+            st = path.stat()
         except OSError:
             continue
-    return total
-
+        row = index.get(key)
+        if row and row.get("size") == st.st_size and row.get("mtime_ns") == st.st_mtime_ns:
+            fresh[key] = row
+            counts[key] = int(row.get("lines", 0))
+        else:
+            stale.append((key, path, st))
 
-def count_cheng_loc(path: Path) -> int:
-    total = 0
-    if path.is_file():
+    def scan(item: tuple[str, Path, os.stat_result]) -> tuple[str, os.stat_result, int | None]:
+        key, path, st = item
         try:
-            with path.open("r", encoding="utf-8", errors="ignore") as fh:
-                return sum(1 for _ in fh)
+            return key, st, count_lines_fast(path)
         except OSError:
-            return 0
-    if path.is_dir():
-        for cheng in path.rglob("*.cheng"):
-            try:
-                with cheng.open("r", encoding="utf-8", errors="ignore") as fh:
-                    total += sum(1 for _ in fh)
-            except OSError:
+            return key, st, None
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for key, st, lines in pool.map(scan, stale):
+            if lines is None:
                 continue
-    return total
+            fresh[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "lines": lines}
+            counts[key] = lines
+    return counts, fresh
 
 
 def load_module_map(cheng_root: Path, module_map_path: str) -> dict[str, Any]:
@@ -112,14 +193,35 @@ def main() -> int:
             mapping_by_crate[crate] = row
 
     members = read_workspace_members(codex_rs_dir)
+
+    # Collect every file once, then count only what changed since the last run.
+    rs_files: dict[str, list[Path]] = {}
+    for crate in members:
+        crate_path = codex_rs_dir / crate
+        rs_files[crate] = walk_files(crate_path, ".rs") if crate_path.exists() else []
+    cheng_files: dict[str, list[Path]] = {}
+    for row in mappings_raw:
+        for mod in row.get("cheng_modules", []):
+            rel = normalize_path(str(mod))
+            if rel not in cheng_files:
+                mod_path = cheng_root / rel
+                cheng_files[rel] = walk_files(mod_path, ".cheng") if mod_path.exists() else []
+
+    index_path = Path(args.loc_index)
+    if not index_path.is_absolute():
+        index_path = cheng_root / index_path
+    all_files = [p for paths in rs_files.values() for p in paths]
+    all_files.extend(p for paths in cheng_files.values() for p in paths)
+    counts, index = count_loc_indexed(all_files, load_loc_index(index_path), args.jobs)
+    save_loc_index(index_path, index)
+
     crates: list[dict[str, Any]] = []
     implemented = 0
     partial = 0
     missing = 0
 
     for crate in members:
-        crate_path = codex_rs_dir / crate
-        rs_loc = count_rs_loc(crate_path)
+        rs_loc = sum(counts.get(str(p), 0) for p in rs_files[crate])
 
         mapping = mapping_by_crate.get(crate)
         mapped_modules = mapping.get("cheng_modules", []) if mapping else []
@@ -132,14 +234,16 @@ def main() -> int:
             rel = normalize_path(str(mod))
             mod_path = cheng_root / rel
             exists = mod_path.exists()
+            loc = 0
             if exists:
                 existing_count += 1
-                mapped_loc += count_cheng_loc(mod_path)
+                loc = sum(counts.get(str(p), 0) for p in cheng_files.get(rel, []))
+                mapped_loc += loc
             module_rows.append(
                 {
                     "path": rel,
                     "exists": exists,
-                    "loc": count_cheng_loc(mod_path) if exists else 0,
+                    "loc": loc,
                 }
             )
 
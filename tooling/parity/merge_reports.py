@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Merge `run_parity.py --shard i/n` reports into one parity report."""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+from pathlib import Path
+import sys
+from typing import Any
+
+from run_parity import render_report_text
+
+SUMMARY_KEYS = ("total", "pass", "fail", "skip", "perf_fail")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Merge sharded parity reports")
+    parser.add_argument("reports", nargs="+", help="Shard report.json files")
+    parser.add_argument("--cheng-root", default=".", help="Path to cheng-codex repo root")
+    parser.add_argument("--out-json", default="build/parity/report.json", help="Merged report json")
+    parser.add_argument("--out-txt", default="build/parity/report.txt", help="Merged report txt")
+    parser.add_argument(
+        "--perf-advisory",
+        action="store_true",
+        help="Report perf_fail cases without failing the exit code",
+    )
+    return parser.parse_args()
+
+
+def merge_reports(reports: list[tuple[str, dict[str, Any]]]) -> dict[str, Any]:
+    """Combine shard reports, restoring the unsharded scenario order.
+
+    Raises ValueError when the shards disagree on their count or one is missing.
+    """
+    shards = [report.get("shard") for _path, report in reports]
+    counts = {shard["count"] for shard in shards if shard is not None}
+    if len(counts) > 1:
+        raise ValueError(f"shard reports disagree on shard count: {sorted(counts)}")
+    if counts:
+        count = counts.pop()
+        indices = sorted(shard["index"] for shard in shards if shard is not None)
+        if indices != list(range(1, count + 1)):
+            raise ValueError(f"expected shards 1..{count}, got {indices}")
+
+    ordered: list[tuple[int, int, int, dict[str, Any]]] = []
+    for report_idx, (_path, report) in enumerate(reports):
+        shard = report.get("shard")
+        results = report.get("results", [])
+        positions = shard["positions"] if shard is not None else []
+        for row_idx, row in enumerate(results):
+            # Unsharded inputs keep their own order after every sharded row.
+            pos = positions[row_idx] if row_idx < len(positions) else sys.maxsize
+            ordered.append((pos, report_idx, row_idx, row))
+    ordered.sort(key=lambda item: item[:3])
+
+    summary = {key: sum(int(report.get("summary", {}).get(key, 0)) for _path, report in reports) for key in SUMMARY_KEYS}
+    first = reports[0][1]
+    caches = [report.get("baseline_cache", {}) for _path, report in reports]
+    return {
+        "version": first.get("version", 1),
+        "generated_at": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "host_platform": first.get("host_platform", ""),
+        "cheng_root": first.get("cheng_root", ""),
+        "codex_rs_dir": first.get("codex_rs_dir", ""),
+        "codex_rs_cmd": first.get("codex_rs_cmd", []),
+        "cheng_cmd": first.get("cheng_cmd", []),
+        "baseline_build": first.get("baseline_build", {}),
+        # Shards run side by side, so the slowest one bounds the wall time.
+        "scenario_ms": max(int(report.get("scenario_ms", 0)) for _path, report in reports),
+        "baseline_cache": {
+            "enabled": any(cache.get("enabled") for cache in caches),
+            "dir": caches[0].get("dir", ""),
+            "identity": caches[0].get("identity", ""),
+            "hits": sum(int(cache.get("hits", 0)) for cache in caches),
+        },
+        "merged_from": [
+            {
+                "path": path,
+                "shard": report.get("shard", {}).get("index", 0),
+                "scenario_ms": report.get("scenario_ms", 0),
+                "total": report.get("summary", {}).get("total", 0),
+            }
+            for path, report in reports
+        ],
+        "summary": summary,
+        "results": [row for *_keys, row in ordered],
+    }
+
+
+def main() -> int:
+    args = parse_args()
+    cheng_root = Path(args.cheng_root).resolve()
+
+    reports: list[tuple[str, dict[str, Any]]] = []
+    for raw in args.reports:
+        path = Path(raw)
+        if not path.is_absolute():
+            path = cheng_root / path
+        reports.append((str(path), json.loads(path.read_text(encoding="utf-8"))))
+    try:
+        report = merge_reports(reports)
+    except ValueError as exc:
+        print(f"merge_reports: {exc}", file=sys.stderr)
+        return 2
+
+    out_json = Path(args.out_json)
+    if not out_json.is_absolute():
+        out_json = cheng_root / out_json
+    out_txt = Path(args.out_txt)
+    if not out_txt.is_absolute():
+        out_txt = cheng_root / out_txt
+    out_json.parent.mkdir(parents=True, exist_ok=True)
+    out_txt.parent.mkdir(parents=True, exist_ok=True)
+    out_json.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    out_txt.write_text(render_report_text(report), encoding="utf-8")
+
+    print(str(out_json))
+    print(str(out_txt))
+
+    summary = report["summary"]
+    if summary["fail"] > 0:
+        return 1
+    if summary["perf_fail"] > 0 and not args.perf_advisory:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""Offline stand-in for the model endpoint used by cheng-codex and codex-rs.
+
+Serves `POST .../responses` as a Responses API SSE stream and
+`POST .../chat/completions` as a Chat Completions body (or chunk stream when the
+request sets `"stream": true`). Point a client at it with `CODEX_BASE_URL` /
+`OPENAI_BASE_URL` and any non-empty API key.
+
+Behavior is configured by a plain dict (see `DEFAULT_CONFIG`): reply size, token
+pacing, first-byte delay, tool-call emission and error / 429 injection. Every request
+is logged with its status and timing so callers can separate client overhead from
+time spent waiting on the model.
+"""
+
+from __future__ import annotations
+
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+from pathlib import Path
+import threading
+import time
+from typing import Any
+
+DEFAULT_REPLY = "Mock model reply for offline load runs."
+
+DEFAULT_CONFIG: dict[str, Any] = {
+    # Assistant text; `reply_words` > 0 replaces it with that many synthetic words.
+    "reply": DEFAULT_REPLY,
+    "reply_words": 0,
+    # Streamed deltas (one per word) per second; 0 streams without pacing.
+    "tokens_per_sec": 0.0,
+    # Delay before the status line is written.
+    "first_byte_ms": 0,
+    # {"name": ..., "arguments": {...}} emits a function call until the request
+    # carries a tool output, then the reply text.
+    "tool_call": None,
+    # Requests 1..fail_first fail, then every fail_every-th request fails.
+    "fail_first": 0,
+    "fail_every": 0,
+    "error_status": 429,
+    "retry_after_sec": 1,
+    # Keep at most this many per-request log rows.
+    "log_limit": 200,
+}
+
+
+def mock_config(raw: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Merge `raw` over `DEFAULT_CONFIG`; raises ValueError on unknown keys."""
+    if raw is not None and not isinstance(raw, dict):
+        raise ValueError("mock_model must be an object")
+    config = dict(DEFAULT_CONFIG)
+    for key, value in (raw or {}).items():
+        if key not in DEFAULT_CONFIG:
+            raise ValueError(f"unknown mock_model key: {key!r}")
+        config[key] = value
+    tool_call = config["tool_call"]
+    if tool_call is not None and not (isinstance(tool_call, dict) and tool_call.get("name")):
+        raise ValueError("mock_model tool_call needs a name")
+    return config
+
+
+def sse_event(event: str, data: dict[str, Any]) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+def sse_data(data: dict[str, Any] | str) -> bytes:
+    payload = data if isinstance(data, str) else json.dumps(data, separators=(",", ":"))
+    return f"data: {payload}\n\n".encode("utf-8")
+
+
+def reply_text(config: dict[str, Any]) -> str:
+    words = int(config["reply_words"])
+    if words > 0:
+        return " ".join(f"token{idx}" for idx in range(words))
+    return str(config["reply"])
+
+
+def reply_deltas(text: str) -> list[str]:
+    """Split `text` into word-sized deltas that concatenate back to `text`."""
+    words = text.split(" ")
+    return [word if idx == 0 else " " + word for idx, word in enumerate(words)]
+
+
+def tool_arguments(tool_call: dict[str, Any]) -> str:
+    arguments = tool_call.get("arguments", {})
+    return arguments if isinstance(arguments, str) else json.dumps(arguments, separators=(",", ":"))
+
+
+def has_tool_output(body: dict[str, Any]) -> bool:
+    items = body.get("input")
+    if isinstance(items, list) and any(isinstance(i, dict) and i.get("type") == "function_call_output" for i in items):
+        return True
+    messages = body.get("messages")
+    return isinstance(messages, list) and any(isinstance(m, dict) and m.get("role") == "tool" for m in messages)
+
+
+def token_chunks(head: bytes, body: list[bytes], tail: bytes) -> list[bytes]:
+    """Fold framing events into the first and last delta so each chunk is one paced token."""
+    chunks = list(body) or [b""]
+    chunks[0] = head + chunks[0]
+    chunks[-1] = chunks[-1] + tail
+    return chunks
+
+
+def responses_events(response_id: str, model: str, text: str, tool_call: dict[str, Any] | None) -> list[bytes]:
+    """Return the Responses SSE stream as one chunk per streamed delta."""
+    if tool_call is not None:
+        item: dict[str, Any] = {
+            "type": "function_call",
+            "id": f"fc_{response_id}",
+            "call_id": f"call_{response_id}",
+            "name": str(tool_call["name"]),
+            "arguments": tool_arguments(tool_call),
+            "status": "completed",
+        }
+        deltas = [item["arguments"]]
+        delta_event = "response.function_call_arguments.delta"
+    else:
+        item = {
+            "type": "message",
+            "id": f"msg_{response_id}",
+            "status": "completed",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }
+        deltas = reply_deltas(text)
+        delta_event = "response.output_text.delta"
+    pending = {**item, "status": "in_progress"}
+    if tool_call is None:
+        pending["content"] = []
+    else:
+        pending["arguments"] = ""
+    head = sse_event(
+        "response.created",
+        {"type": "response.created", "response": {"id": response_id, "status": "in_progress", "model": model}},
+    )
+    head += sse_event("response.output_item.added", {"type": "response.output_item.added", "output_index": 0, "item": pending})
+    body = [
+        sse_event(delta_event, {"type": delta_event, "item_id": item["id"], "output_index": 0, "content_index": 0, "delta": delta})
+        for delta in deltas
+    ]
+    tail = sse_event("response.output_item.done", {"type": "response.output_item.done", "output_index": 0, "item": item})
+    # The client reads the final `response.completed` payload, whose first `id` must be
+    # the response id.
+    tail += sse_event(
+        "response.completed",
+        {
+            "type": "response.completed",
+            "response": {
+                "id": response_id,
+                "status": "completed",
+                "model": model,
+                "output": [item],
+                "usage": {"input_tokens": 0, "output_tokens": len(deltas), "total_tokens": len(deltas)},
+            },
+        },
+    )
+    return token_chunks(head, body, tail)
+
+
+def chat_tool_calls(response_id: str, tool_call: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {
+            "index": 0,
+            "id": f"call_{response_id}",
+            "type": "function",
+            "function": {"name": str(tool_call["name"]), "arguments": tool_arguments(tool_call)},
+        }
+    ]
+
+
+def chat_completion(response_id: str, model: str, text: str, tool_call: dict[str, Any] | None) -> dict[str, Any]:
+    message: dict[str, Any] = {"role": "assistant", "content": text}
+    finish = "stop"
+    if tool_call is not None:
+        message = {"role": "assistant", "content": None, "tool_calls": chat_tool_calls(response_id, tool_call)}
+        finish = "tool_calls"
+    tokens = len(reply_deltas(text))
+    return {
+        "id": response_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": tokens, "total_tokens": tokens},
+    }
+
+
+def chat_chunks(response_id: str, model: str, text: str, tool_call: dict[str, Any] | None) -> list[bytes]:
+    created = int(time.time())
+
+    def chunk(delta: dict[str, Any], finish: str | None = None) -> bytes:
+        return sse_data(
+            {
+                "id": response_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+        )
+
+    head = chunk({"role": "assistant", "content": ""})
+    if tool_call is not None:
+        body = [chunk({"tool_calls": chat_tool_calls(response_id, tool_call)})]
+        finish = "tool_calls"
+    else:
+        body = [chunk({"content": delta}) for delta in reply_deltas(text)]
+        finish = "stop"
+    return token_chunks(head, body, chunk({}, finish) + sse_data("[DONE]"))
+
+
+class MockModelServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load runs open many connections at once; the stdlib default backlog of 5 drops them.
+    request_queue_size = 256
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: dict[str, Any] | None = None) -> None:
+        super().__init__((host, port), MockModelHandler)
+        self.config = mock_config(config)
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failed = 0
+        self.served_ms = 0.0
+        self.log: list[dict[str, Any]] = []
+        self.thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def admit(self) -> tuple[int, bool]:
+        """Number the request and decide whether it gets the injected error."""
+        with self.lock:
+            self.requests += 1
+            seq = self.requests
+        fail_first = int(self.config["fail_first"])
+        fail_every = int(self.config["fail_every"])
+        if seq <= fail_first:
+            return seq, True
+        return seq, fail_every > 0 and (seq - fail_first) % fail_every == 0
+
+    def record(self, row: dict[str, Any]) -> None:
+        with self.lock:
+            if row["status"] >= 400:
+                self.failed += 1
+            self.served_ms += row["duration_ms"]
+            if len(self.log) < int(self.config["log_limit"]):
+                self.log.append(row)
+
+    def stats(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "failed": self.failed,
+                "served_ms": round(self.served_ms, 3),
+                "log": list(self.log),
+            }
+
+    def start(self) -> str:
+        """Serve from a daemon thread and return the base URL."""
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+
+
+class MockModelHandler(BaseHTTPRequestHandler):
+    server: MockModelServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def read_body(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length", "0") or 0)
+        raw = self.rfile.read(length) if length > 0 else b""
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            body = {}
+        return body if isinstance(body, dict) else {}
+
+    def send_json(self, status: int, payload: dict[str, Any], headers: dict[str, str] | None = None) -> None:
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_stream(self, chunks: list[bytes], tokens_per_sec: float) -> None:
+        """Write SSE chunks at `tokens_per_sec` on a fixed schedule so sleeps do not drift."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        interval = 1.0 / tokens_per_sec if tokens_per_sec > 0 else 0.0
+        start = time.monotonic()
+        for idx, chunk in enumerate(chunks):
+            if interval > 0 and idx > 0:
+                delay = start + idx * interval - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self.wfile.write(chunk)
+            self.wfile.flush()
+        self.close_connection = True
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path.endswith("/models"):
+            self.send_json(200, {"object": "list", "data": [{"id": "mock-model", "object": "model"}]})
+            return
+        self.send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def do_POST(self) -> None:
+        started = time.monotonic()
+        path = self.path.split("?", 1)[0].rstrip("/")
+        body = self.read_body()
+        config = self.server.config
+        if not (path.endswith("/responses") or path.endswith("/chat/completions")):
+            self.send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        seq, fail = self.server.admit()
+        first_byte_ms = float(config["first_byte_ms"])
+        if first_byte_ms > 0:
+            time.sleep(first_byte_ms / 1000.0)
+        row: dict[str, Any] = {"seq": seq, "path": path, "first_byte_ms": round((time.monotonic() - started) * 1000, 3)}
+        if fail:
+            status = int(config["error_status"])
+            headers = {"Retry-After": str(config["retry_after_sec"])} if status == 429 else {}
+            kind = "rate_limit_exceeded" if status == 429 else "server_error"
+            self.send_json(status, {"error": {"message": f"mock injected {status}", "type": kind, "code": kind}}, headers)
+            row.update({"status": status, "tokens": 0, "tool_call": False})
+        else:
+            model = str(body.get("model", "mock-model"))
+            text = reply_text(config)
+            tool_call = config["tool_call"] if config["tool_call"] and not has_tool_output(body) else None
+            prefix = "resp" if path.endswith("/responses") else "chatcmpl"
+            response_id = f"{prefix}_mock_{next(self.server.ids)}"
+            tokens_per_sec = float(config["tokens_per_sec"])
+            if path.endswith("/responses"):
+                self.send_stream(responses_events(response_id, model, text, tool_call), tokens_per_sec)
+            elif body.get("stream") is True:
+                self.send_stream(chat_chunks(response_id, model, text, tool_call), tokens_per_sec)
+            else:
+                tokens = len(reply_deltas(text))
+                if tokens_per_sec > 0:
+                    time.sleep(tokens / tokens_per_sec)
+                self.send_json(200, chat_completion(response_id, model, text, tool_call))
+            row.update({"status": 200, "tokens": 0 if tool_call else len(reply_deltas(text)), "tool_call": tool_call is not None})
+        row["duration_ms"] = round((time.monotonic() - started) * 1000, 3)
+        self.server.record(row)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve an offline mock model endpoint")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=0, help="Bind port (0 picks a free port)")
+    parser.add_argument("--url-file", default="", help="Write the base URL here once listening")
+    parser.add_argument("--reply", default=DEFAULT_REPLY, help="Assistant message returned for every request")
+    parser.add_argument("--reply-words", type=int, default=0, help="Reply with this many synthetic words instead")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="Stream pacing (0 = unpaced)")
+    parser.add_argument("--first-byte-ms", type=float, default=0.0, help="Delay before the response starts")
+    parser.add_argument("--tool-call", default="", help="Emit this function call (name) until a tool output arrives")
+    parser.add_argument("--tool-arguments", default="{}", help="JSON arguments for --tool-call")
+    parser.add_argument("--fail-first", type=int, default=0, help="Fail the first N requests")
+    parser.add_argument("--fail-every", type=int, default=0, help="Then fail every N-th request")
+    parser.add_argument("--error-status", type=int, default=429, help="HTTP status for injected failures")
+    parser.add_argument("--retry-after-sec", type=int, default=1, help="Retry-After header sent with 429")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    config = {
+        "reply": args.reply,
+        "reply_words": args.reply_words,
+        "tokens_per_sec": args.tokens_per_sec,
+        "first_byte_ms": args.first_byte_ms,
+        "tool_call": {"name": args.tool_call, "arguments": args.tool_arguments} if args.tool_call else None,
+        "fail_first": args.fail_first,
+        "fail_every": args.fail_every,
+        "error_status": args.error_status,
+        "retry_after_sec": args.retry_after_sec,
+    }
+    server = MockModelServer(args.host, args.port, config)
+    print(server.base_url, flush=True)
+    if args.url_file:
+        # Write then rename so a polling reader never sees a partial URL.
+        url_file = Path(args.url_file)
+        tmp = url_file.with_name(url_file.name + ".tmp")
+        tmp.write_text(server.base_url + "\n", encoding="utf-8")
+        tmp.replace(url_file)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
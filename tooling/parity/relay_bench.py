@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""Throughput benchmark for the `responses-api-proxy` and `stdio-to-uds` relays.
+
+`responses-api-proxy` forwards to a local `mock_model.py` upstream; each request opens
+a new client connection, POSTs `/v1/responses` and reads the streamed reply to EOF.
+`stdio-to-uds` relays to a local Unix-socket echo server; each session spawns the relay,
+pushes `--uds-bytes` through stdin and reads the echo back from stdout.
+
+For every concurrency level the report records requests (or sessions) per second,
+MB/s, time to the first relayed byte (connection setup plus one relay round trip), and
+p50/p99 latency, per binary. When `--codex-rs-bin` is
+given, each cheng level is compared with the baseline at the same concurrency.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import http.client
+import json
+from pathlib import Path
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any
+
+from mock_model import MockModelServer
+from run_parity import detect_cheng_bin, isolated_host_env, latency_summary
+
+RELAYS = ("responses-api-proxy", "stdio-to-uds")
+STARTUP_TIMEOUT_SEC = 10.0
+UDS_CHUNK = 64 * 1024
+MAX_REPORTED_ERRORS = 20
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark responses-api-proxy and stdio-to-uds relays")
+    parser.add_argument("--cheng-root", default=".", help="Path to cheng-codex repo root")
+    parser.add_argument("--cheng-bin", default="", help="Path to built cheng-codex binary")
+    parser.add_argument("--codex-rs-bin", default="", help="Also benchmark this codex-rs binary for comparison")
+    parser.add_argument("--relay", action="append", choices=RELAYS, default=[], help="Relay(s) to run (default: both)")
+    parser.add_argument("--clients", default="1,8,64", help="Comma-separated concurrent client counts")
+    parser.add_argument("--requests", type=int, default=20, help="Proxy requests per client per level")
+    parser.add_argument("--reply-words", type=int, default=2000, help="Upstream reply size in words (proxy)")
+    parser.add_argument("--sessions", type=int, default=3, help="stdio-to-uds sessions per client per level")
+    parser.add_argument("--uds-bytes", type=int, default=1 << 20, help="Bytes echoed per stdio-to-uds session")
+    parser.add_argument("--timeout-sec", type=float, default=60.0, help="Per-request / per-session timeout")
+    parser.add_argument("--out-json", default="build/parity/relay_bench.json", help="Output report JSON path")
+    return parser.parse_args()
+
+
+def parse_counts(text: str) -> list[int]:
+    counts = [int(part) for part in text.split(",") if part.strip()]
+    if not counts or any(count < 1 for count in counts):
+        raise ValueError(f"invalid --clients {text!r}")
+    return counts
+
+
+def run_clients(count: int, work: Any) -> tuple[list[dict[str, Any]], float]:
+    """Run `work(idx)` on `count` threads released together; returns rows and wall seconds."""
+    barrier = threading.Barrier(count + 1)
+    rows: list[list[dict[str, Any]]] = [[] for _ in range(count)]
+
+    def worker(idx: int) -> None:
+        barrier.wait()
+        rows[idx] = work(idx)
+
+    threads = [threading.Thread(target=worker, args=(idx,), daemon=True) for idx in range(count)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.monotonic()
+    for thread in threads:
+        thread.join()
+    return [row for client_rows in rows for row in client_rows], max(time.monotonic() - start, 1e-9)
+
+
+def level_summary(rows: list[dict[str, Any]], wall_sec: float) -> dict[str, Any]:
+    ok = [row for row in rows if "error" not in row]
+    errors = [row["error"] for row in rows if "error" in row]
+    total_bytes = sum(row["bytes"] for row in ok)
+    return {
+        "wall_ms": round(wall_sec * 1000, 3),
+        "completed": len(ok),
+        "per_sec": round(len(ok) / wall_sec, 3),
+        "mb_per_sec": round(total_bytes / wall_sec / 1e6, 3),
+        "bytes": total_bytes,
+        "first_byte_ms": latency_summary([row["first_byte_ms"] for row in ok]),
+        "latency_ms": latency_summary([row["latency_ms"] for row in ok]),
+        "error_count": len(errors),
+        "errors": errors[:MAX_REPORTED_ERRORS],
+    }
+
+
+def wait_for_file(path: Path, proc: subprocess.Popen[bytes], timeout_sec: float) -> str:
+    deadline = time.monotonic() + timeout_sec
+    while time.monotonic() < deadline:
+        if path.is_file():
+            text = path.read_text(encoding="utf-8").strip()
+            if text.endswith("}"):
+                return text
+        if proc.poll() is not None:
+            break
+        time.sleep(0.02)
+    raise RuntimeError(f"relay did not start (exit={proc.poll()})")
+
+
+def proxy_request(port: int, body: bytes, timeout_sec: float) -> dict[str, Any]:
+    start = time.monotonic()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout_sec)
+    try:
+        conn.request("POST", "/v1/responses", body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        first_byte = time.monotonic()
+        data = resp.read()
+        done = time.monotonic()
+    except (OSError, http.client.HTTPException) as exc:
+        return {"error": f"{type(exc).__name__}: {exc}"}
+    finally:
+        conn.close()
+    if resp.status != 200 or b"response.completed" not in data:
+        return {"error": f"status {resp.status}, {len(data)} bytes"}
+    return {
+        "bytes": len(data),
+        "first_byte_ms": round((first_byte - start) * 1000, 3),
+        "latency_ms": round((done - start) * 1000, 3),
+    }
+
+
+def bench_proxy(cmd: list[str], counts: list[int], args: argparse.Namespace) -> list[dict[str, Any]]:
+    upstream = MockModelServer(config={"reply_words": args.reply_words})
+    upstream_url = upstream.start() + "/responses"
+    env = isolated_host_env("relay-bench-home-")
+    info_path = Path(env["HOME"]) / "server-info.json"
+    proc = subprocess.Popen(
+        [*cmd, "responses-api-proxy", "--server-info", str(info_path), "--upstream-url", upstream_url],
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    levels: list[dict[str, Any]] = []
+    try:
+        assert proc.stdin is not None
+        proc.stdin.write(b"sk-relay-bench\n")
+        proc.stdin.close()
+        port = int(json.loads(wait_for_file(info_path, proc, STARTUP_TIMEOUT_SEC))["port"])
+        body = json.dumps({"model": "mock-model", "input": [], "stream": True}).encode("utf-8")
+        for count in counts:
+            before = upstream.requests
+            rows, wall_sec = run_clients(
+                count,
+                lambda _idx: [proxy_request(port, body, args.timeout_sec) for _ in range(args.requests)],
+            )
+            level = {"relay": "responses-api-proxy", "clients": count, **level_summary(rows, wall_sec)}
+            level["upstream_requests"] = upstream.requests - before
+            levels.append(level)
+    finally:
+        proc.kill()
+        proc.wait()
+        upstream.stop()
+        shutil.rmtree(env["HOME"], ignore_errors=True)
+    return levels
+
+
+class EchoHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        while True:
+            data = self.request.recv(UDS_CHUNK)
+            if not data:
+                break
+            self.request.sendall(data)
+        # The relay exits once the echo side closes after its stdin EOF.
+        self.request.shutdown(socket.SHUT_WR)
+
+
+class EchoServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def uds_session(cmd: list[str], sock_path: str, env: dict[str, str], payload: bytes, timeout_sec: float) -> dict[str, Any]:
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        [*cmd, "stdio-to-uds", sock_path],
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    received = 0
+    first_byte = 0.0
+
+    def feed() -> None:
+        assert proc.stdin is not None
+        try:
+            for offset in range(0, len(payload), UDS_CHUNK):
+                proc.stdin.write(payload[offset : offset + UDS_CHUNK])
+            proc.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    timer = threading.Timer(timeout_sec, proc.kill)
+    timer.start()
+    try:
+        assert proc.stdout is not None
+        while True:
+            chunk = proc.stdout.read1(UDS_CHUNK)
+            if not chunk:
+                break
+            if not first_byte:
+                first_byte = time.monotonic()
+            received += len(chunk)
+        proc.wait()
+    finally:
+        timer.cancel()
+        writer.join(timeout=1)
+    done = time.monotonic()
+    if received != len(payload) or proc.returncode != 0:
+        return {"error": f"exit={proc.returncode}, echoed {received}/{len(payload)} bytes"}
+    # Spawn + connect + the first echo round trip.
+    return {
+        "bytes": received,
+        "first_byte_ms": round((first_byte - start) * 1000, 3),
+        "latency_ms": round((done - start) * 1000, 3),
+    }
+
+
+def bench_uds(cmd: list[str], counts: list[int], args: argparse.Namespace) -> list[dict[str, Any]]:
+    sock_dir = Path(tempfile.mkdtemp(prefix="relay-bench-uds-"))
+    sock_path = str(sock_dir / "echo.sock")
+    server = EchoServer(sock_path, EchoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    env = isolated_host_env("relay-bench-home-")
+    payload = bytes(range(256)) * (args.uds_bytes // 256) + bytes(args.uds_bytes % 256)
+    levels: list[dict[str, Any]] = []
+    try:
+        for count in counts:
+            rows, wall_sec = run_clients(
+                count,
+                lambda _idx: [uds_session(cmd, sock_path, env, payload, args.timeout_sec) for _ in range(args.sessions)],
+            )
+            levels.append({"relay": "stdio-to-uds", "clients": count, **level_summary(rows, wall_sec)})
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(sock_dir, ignore_errors=True)
+        shutil.rmtree(env["HOME"], ignore_errors=True)
+    return levels
+
+
+def compare_levels(cheng: list[dict[str, Any]], baseline: list[dict[str, Any]]) -> None:
+    """Annotate cheng levels with ratios against the baseline level of the same relay and clients."""
+    by_key = {(level["relay"], level["clients"]): level for level in baseline}
+    for level in cheng:
+        base = by_key.get((level["relay"], level["clients"]))
+        if base is None:
+            continue
+        level["vs_baseline"] = {
+            "per_sec": round(level["per_sec"] / base["per_sec"], 3) if base["per_sec"] else 0.0,
+            "mb_per_sec": round(level["mb_per_sec"] / base["mb_per_sec"], 3) if base["mb_per_sec"] else 0.0,
+            "p99_ms": round(level["latency_ms"]["p99"] / base["latency_ms"]["p99"], 3) if base["latency_ms"]["p99"] else 0.0,
+        }
+
+
+def format_level(target: str, level: dict[str, Any]) -> str:
+    line = (
+        f"{target:<9} {level['relay']:<20} clients={level['clients']:<3} per_sec={level['per_sec']:<9} "
+        f"mb_s={level['mb_per_sec']:<8} first_byte_p50={level['first_byte_ms']['p50']}ms "
+        f"p50={level['latency_ms']['p50']}ms p99={level['latency_ms']['p99']}ms errors={level['error_count']}"
+    )
+    if "vs_baseline" in level:
+        line += f" vs_baseline(per_sec)={level['vs_baseline']['per_sec']}"
+    return line
+
+
+def main() -> int:
+    args = parse_args()
+    cheng_root = Path(args.cheng_root).resolve()
+    counts = parse_counts(args.clients)
+    relays = args.relay or list(RELAYS)
+
+    targets: list[tuple[str, list[str]]] = [("cheng", [str(detect_cheng_bin(cheng_root, args.cheng_bin))])]
+    if args.codex_rs_bin:
+        targets.append(("codex-rs", [str(Path(args.codex_rs_bin).resolve())]))
+
+    results: dict[str, list[dict[str, Any]]] = {}
+    try:
+        for target, cmd in targets:
+            levels: list[dict[str, Any]] = []
+            if "responses-api-proxy" in relays:
+                levels.extend(bench_proxy(cmd, counts, args))
+            if "stdio-to-uds" in relays:
+                levels.extend(bench_uds(cmd, counts, args))
+            results[target] = levels
+    except RuntimeError as exc:
+        print(f"relay_bench: {exc}", file=sys.stderr)
+        return 2
+    if "codex-rs" in results:
+        compare_levels(results["cheng"], results["codex-rs"])
+    for target, levels in results.items():
+        for level in levels:
+            print(format_level(target, level), flush=True)
+
+    report = {
+        "version": 1,
+        "generated_at": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "targets": [{"target": target, "cmd": cmd} for target, cmd in targets],
+        "settings": {
+            "clients": counts,
+            "requests_per_client": args.requests,
+            "reply_words": args.reply_words,
+            "sessions_per_client": args.sessions,
+            "uds_bytes": args.uds_bytes,
+        },
+        "results": results,
+    }
+    out_json = Path(args.out_json)
+    if not out_json.is_absolute():
+        out_json = cheng_root / out_json
+    out_json.parent.mkdir(parents=True, exist_ok=True)
+    out_json.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(str(out_json))
+    return 1 if any(level["error_count"] for levels in results.values() for level in levels) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
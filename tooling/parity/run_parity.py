@@ -7,22 +7,43 @@ Scenario files are `.yaml` but encoded as JSON (JSON is valid YAML).
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import datetime as dt
+import errno
+import fcntl
+import hashlib
+import io
 import json
 import os
+import platform
 from pathlib import Path
 import re
 import shutil
+import signal
+import statistics
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 from typing import Any
 
+from cheng_index import DEFAULT_INDEX_PATH as CHENG_INDEX_PATH
+from cheng_index import ChengIndex, parse_entry_ref
+from mock_model import MockModelServer
+
 ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
 WS_RE = re.compile(r"\s+")
 VER_RE = re.compile(r"\b\d+\.\d+(?:\.\d+)?\b")
 
+BEHAVIOR_MANIFEST_PATH = "tooling/parity/behavior_manifest.yaml"
+MODULE_MAP_PATH = "tooling/parity/module_map.yaml"
+# Changed files under these dirs (build outputs, prose docs) and README files never affect
+# scenario outcomes. Other Markdown is not ignored: prompts/*.md and SPEC.md are read at
+# runtime, so an unmapped .md edit falls back to the full plan like any other file.
+CHANGE_IGNORED_DIRS = ("build/", "docs/")
+CHANGE_IGNORED_NAMES = ("README.md",)
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run codex-rs vs cheng-codex parity scenarios")
@@ -48,6 +69,107 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--timeout-sec", type=int, default=25, help="Default command timeout")
     parser.add_argument("--suite", action="append", default=[], help="Run only selected suite(s)")
     parser.add_argument("--case", action="append", default=[], help="Run only selected case id(s)")
+    parser.add_argument(
+        "--changed-since",
+        default="",
+        help="Run only scenarios affected by files changed since this git rev (plus uncommitted changes)",
+    )
+    parser.add_argument(
+        "--changed-files",
+        action="append",
+        default=[],
+        help="Run only scenarios affected by these paths (relative to --cheng-root); repeatable",
+    )
+    parser.add_argument(
+        "--shard",
+        default="",
+        help="Run only shard i of n (1-based, e.g. 2/4), balanced by --shard-timings when given",
+    )
+    parser.add_argument(
+        "--shard-timings",
+        default="",
+        help="Shared report.json (e.g. merge_reports.py output) whose per-case duration_ms balances --shard",
+    )
+    parser.add_argument(
+        "--tmp-root",
+        default="",
+        help="Create case dirs, HOMEs and fixture templates under this dir (e.g. a tmpfs mount)",
+    )
+    parser.add_argument(
+        "--keep-tmp",
+        choices=["never", "failed", "always"],
+        default="never",
+        help="Keep case temp dirs after each case: never (default), only for non-passing cases, or always",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Run up to N cases concurrently (report order is unchanged)",
+    )
+    parser.add_argument(
+        "--serial-sides",
+        action="store_true",
+        help="Run baseline and cheng sides of each case one after the other",
+    )
+    parser.add_argument(
+        "--baseline-bin-cache-dir",
+        default="build/parity/codex-rs-bin",
+        help="Directory for the prebuilt codex-rs binary used instead of `cargo run`",
+    )
+    parser.add_argument(
+        "--no-prebuild-baseline",
+        action="store_true",
+        help="Run the baseline through `cargo run` on every step instead of prebuilding it",
+    )
+    parser.add_argument(
+        "--baseline-cache-dir",
+        default="build/parity/baseline-cache",
+        help="Directory for cached baseline side results",
+    )
+    parser.add_argument(
+        "--no-baseline-cache",
+        action="store_true",
+        help="Always execute the baseline side (do not read or write the cache)",
+    )
+    parser.add_argument(
+        "--clear-baseline-cache",
+        action="store_true",
+        help="Delete the baseline cache directory before running",
+    )
+    parser.add_argument(
+        "--stream-output",
+        action="store_true",
+        help="Stream child output to per-step spill files and keep only a bounded head/tail in memory",
+    )
+    parser.add_argument(
+        "--perf-advisory",
+        action="store_true",
+        help="Report perf_fail cases without failing the run",
+    )
+    parser.add_argument(
+        "--bench",
+        action="store_true",
+        help="Benchmark selected cases instead of checking parity (writes --bench-out)",
+    )
+    parser.add_argument("--bench-warmup", type=int, default=1, help="Warm-up runs per side in --bench mode")
+    parser.add_argument("--bench-runs", type=int, default=10, help="Measured runs per side in --bench mode")
+    parser.add_argument(
+        "--bench-cold-runs",
+        type=int,
+        default=0,
+        help="Extra runs per side in --bench mode, each after evicting the binary from the page cache",
+    )
+    parser.add_argument(
+        "--bench-drop-caches-cmd",
+        default="",
+        help="Shell command used to drop caches before cold runs (default: posix_fadvise on the binary)",
+    )
+    parser.add_argument(
+        "--bench-out",
+        default="build/parity/bench.json",
+        help="Output benchmark JSON path",
+    )
     parser.add_argument(
         "--fail-on-skip",
         action="store_true",
@@ -109,6 +231,8 @@ def detect_cheng_bin(cheng_root: Path, explicit: str) -> Path:
     env_bin = os.environ.get("CODEX_CHENG_BIN", "")
     if env_bin:
         candidates.append(Path(env_bin))
+    # build.sh writes build/cheng-codex; build/codex-cheng is the legacy name.
+    candidates.append(cheng_root / "build/cheng-codex")
     candidates.append(cheng_root / "build/codex-cheng")
 
     for candidate in candidates:
@@ -150,6 +274,81 @@ def detect_codex_rs_runner(cheng_root: Path, codex_rs_dir: Path | None, explicit
     return [cargo, "run", "-q", "-p", "codex-cli", "--"], codex_rs_dir
 
 
+def codex_rs_build_key(codex_rs_dir: Path) -> str:
+    """Hash Cargo.lock plus the workspace commit; "" when the source state is unknown."""
+    if shutil.which("git") is None:
+        return ""
+    head = subprocess.run(
+        ["git", "-C", str(codex_rs_dir), "rev-parse", "HEAD"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if head.returncode != 0:
+        return ""
+    diff = subprocess.run(
+        ["git", "-C", str(codex_rs_dir), "diff", "HEAD"],
+        capture_output=True,
+        check=False,
+    )
+    if diff.returncode != 0:
+        return ""
+    digest = hashlib.sha256()
+    digest.update(head.stdout.strip().encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(diff.stdout)
+    lock = codex_rs_dir / "Cargo.lock"
+    if lock.is_file():
+        digest.update(b"\0")
+        digest.update(lock.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def prebuild_codex_rs_bin(codex_rs_dir: Path, cache_root: Path) -> tuple[Path, dict[str, Any]]:
+    """Build codex-rs once per session instead of paying `cargo run` on every step."""
+    started = time.monotonic()
+    key = codex_rs_build_key(codex_rs_dir)
+    cached_bin = cache_root / key / "codex" if key else None
+    if cached_bin is not None and cached_bin.is_file() and os.access(cached_bin, os.X_OK):
+        return cached_bin, {
+            "mode": "prebuilt",
+            "key": key,
+            "cached": True,
+            "build_ms": int((time.monotonic() - started) * 1000),
+            "bin": str(cached_bin),
+        }
+
+    cargo = shutil.which("cargo")
+    if not cargo:
+        raise FileNotFoundError("cargo not found; required to build codex-rs baseline")
+    target_dir = cache_root / "target"
+    proc = subprocess.run(
+        [cargo, "build", "-q", "-p", "codex-cli", "--bin", "codex", "--target-dir", str(target_dir)],
+        cwd=str(codex_rs_dir),
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"codex-rs baseline build failed with exit code {proc.returncode}")
+    built = target_dir / "debug/codex"
+    if not built.is_file():
+        raise FileNotFoundError(f"codex-rs baseline build produced no binary: {built}")
+
+    out_bin = built
+    if cached_bin is not None:
+        cached_bin.parent.mkdir(parents=True, exist_ok=True)
+        staging = cached_bin.with_name("codex.tmp")
+        shutil.copy2(built, staging)
+        os.replace(staging, cached_bin)
+        out_bin = cached_bin
+    return out_bin, {
+        "mode": "prebuilt",
+        "key": key,
+        "cached": False,
+        "build_ms": int((time.monotonic() - started) * 1000),
+        "bin": str(out_bin),
+    }
+
+
 def write_case_files(files: list[dict[str, Any]], case_tmp: Path) -> None:
     for row in files:
         rel = str(row.get("path", "")).strip()
@@ -161,6 +360,77 @@ def write_case_files(files: list[dict[str, Any]], case_tmp: Path) -> None:
         path.write_text(content, encoding="utf-8")
 
 
+# Linux FICLONE ioctl: share the source extents copy-on-write (btrfs, xfs, bcachefs).
+FICLONE = 0x40049409
+
+
+def clone_file(src: Path, dst: Path, reflink: bool) -> bool:
+    """Copy `src` to `dst`, as a reflink when possible; return whether reflinks still work."""
+    if reflink:
+        with src.open("rb") as fsrc, dst.open("wb") as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                return True
+            except OSError as exc:
+                if exc.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+                    raise
+    shutil.copyfile(src, dst)
+    return False
+
+
+class FixtureTemplates:
+    """Materializes each distinct set of static `files` once and clones it into CASE_TMP.
+
+    Files whose path or content use `{{...}}` placeholders differ per side and are still
+    written directly. Clones are reflinks where the filesystem supports them and plain
+    copies otherwise; never hardlinks, since cases (apply_patch, for one) rewrite their
+    fixtures in place and would corrupt the shared template.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.lock = threading.Lock()
+        self.building: dict[str, threading.Lock] = {}
+        self.reflink = sys.platform.startswith("linux")
+
+    def template(self, rows: list[dict[str, Any]]) -> Path:
+        payload = json.dumps([[row.get("path", ""), row.get("content", "")] for row in rows])
+        key = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+        with self.lock:
+            key_lock = self.building.setdefault(key, threading.Lock())
+        tree = self.root / key
+        with key_lock:
+            if not tree.is_dir():
+                self.root.mkdir(parents=True, exist_ok=True)
+                staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=str(self.root)))
+                write_case_files(rows, staging)
+                os.replace(staging, tree)
+        return tree
+
+    def materialize(self, files: list[Any], case_tmp: Path) -> list[dict[str, Any]]:
+        """Clone the static rows of `files` into `case_tmp`; return the rows left to write."""
+        static: list[dict[str, Any]] = []
+        dynamic: list[dict[str, Any]] = []
+        for row in files:
+            if not isinstance(row, dict):
+                continue
+            text = f"{row.get('path', '')}\0{row.get('content', '')}"
+            (dynamic if "{{" in text else static).append(row)
+        if not static:
+            return dynamic
+        tree = self.template(static)
+        for dirpath, _dirnames, filenames in os.walk(tree):
+            for name in filenames:
+                src = Path(dirpath) / name
+                dst = case_tmp / src.relative_to(tree)
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                self.reflink = clone_file(src, dst, self.reflink)
+        return dynamic
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
 def render_value(value: Any, context: dict[str, str]) -> Any:
     if isinstance(value, str):
         out = value
@@ -261,6 +531,456 @@ def run_cmd(
         }
 
 
+STREAM_CHUNK_CHARS = 64 * 1024
+STREAM_HEAD_CHARS = 16 * 1024
+STREAM_TAIL_CHARS = 16 * 1024
+# Needles and regex matches longer than this window are not detected in streaming mode.
+STREAM_MATCH_WINDOW = 64 * 1024
+
+
+class StreamMatcher:
+    """Evaluates `*_contains` / `*_regex` expectations over a stream, chunk by chunk.
+
+    A regex match that reaches the end of the text received so far is only trusted once
+    `finish()` marks EOF: more output could still move `$`, extend the match or break a
+    lookahead.
+    """
+
+    def __init__(self, needles: list[str], patterns: list[str]) -> None:
+        self.pending_needles = [n for n in dict.fromkeys(needles) if n]
+        self.pending_patterns = [(p, re.compile(p, re.MULTILINE)) for p in dict.fromkeys(patterns)]
+        self.found: list[str] = []
+        self.matched: list[str] = []
+        self.window = ""
+
+    def feed(self, chunk: str) -> None:
+        if not chunk or (not self.pending_needles and not self.pending_patterns):
+            return
+        buf = self.window + chunk
+        for needle in list(self.pending_needles):
+            if needle in buf:
+                self.pending_needles.remove(needle)
+                self.found.append(needle)
+        self.match_patterns(buf, at_eof=False)
+        # Keep the window line-aligned so `^` never matches mid-line after a cut.
+        if len(buf) > STREAM_MATCH_WINDOW:
+            cut = buf.find("\n", len(buf) - STREAM_MATCH_WINDOW)
+            buf = buf[cut + 1 :] if cut != -1 else buf[-STREAM_MATCH_WINDOW:]
+        self.window = buf
+
+    def finish(self) -> None:
+        """Re-check the patterns still pending against the tail, now that the stream ended."""
+        if self.pending_patterns:
+            self.match_patterns(self.window, at_eof=True)
+
+    def match_patterns(self, buf: str, at_eof: bool) -> None:
+        for pattern, compiled in list(self.pending_patterns):
+            match = compiled.search(buf)
+            if match is not None and (at_eof or match.end() < len(buf)):
+                self.pending_patterns.remove((pattern, compiled))
+                self.matched.append(pattern)
+
+    def summary(self) -> dict[str, list[str]]:
+        return {"found": list(self.found), "matched": list(self.matched)}
+
+
+class BoundedCapture:
+    """Keeps the head and tail of a stream in memory and spills everything to a file."""
+
+    def __init__(self, spill_path: Path, matcher: StreamMatcher | None) -> None:
+        self.spill_path = spill_path
+        self.matcher = matcher
+        self.head = ""
+        self.tail = ""
+        self.total_chars = 0
+
+    def pump(self, pipe: Any) -> None:
+        with self.spill_path.open("w", encoding="utf-8", errors="replace") as spill:
+            while True:
+                chunk = pipe.read(STREAM_CHUNK_CHARS)
+                if not chunk:
+                    break
+                spill.write(chunk)
+                self.total_chars += len(chunk)
+                if len(self.head) < STREAM_HEAD_CHARS:
+                    take = STREAM_HEAD_CHARS - len(self.head)
+                    self.head += chunk[:take]
+                    chunk_rest = chunk[take:]
+                else:
+                    chunk_rest = chunk
+                if chunk_rest:
+                    self.tail = (self.tail + chunk_rest)[-STREAM_TAIL_CHARS:]
+                if self.matcher is not None:
+                    self.matcher.feed(chunk)
+        pipe.close()
+
+    def text(self) -> str:
+        omitted = self.total_chars - len(self.head) - len(self.tail)
+        if omitted <= 0:
+            return self.head + self.tail
+        return f"{self.head}\n...<{omitted} chars omitted>...\n{self.tail}"
+
+
+def rusage_row(usage: Any) -> dict[str, Any]:
+    # ru_maxrss is kilobytes on Linux but bytes on macOS.
+    max_rss_kb = int(usage.ru_maxrss)
+    if sys.platform.startswith("darwin"):
+        max_rss_kb //= 1024
+    return {
+        "user_ms": round(usage.ru_utime * 1000, 3),
+        "sys_ms": round(usage.ru_stime * 1000, 3),
+        "max_rss_kb": max_rss_kb,
+    }
+
+
+def run_cmd_streaming(
+    cmd: list[str],
+    cwd: Path,
+    env: dict[str, str],
+    stdin_text: str,
+    timeout_sec: int,
+    spill_prefix: Path,
+    matchers: dict[str, StreamMatcher],
+    argv0: str = "",
+) -> dict[str, Any]:
+    start = time.monotonic()
+    run_cmd_args = list(cmd)
+    executable = None
+    if argv0 and os.name != "nt" and len(cmd) > 0:
+        executable = cmd[0]
+        run_cmd_args = [argv0, *cmd[1:]]
+    proc = subprocess.Popen(
+        run_cmd_args,
+        cwd=str(cwd),
+        env=env,
+        executable=executable,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    captures = {
+        "stdout": BoundedCapture(Path(f"{spill_prefix}.stdout"), matchers.get("stdout")),
+        "stderr": BoundedCapture(Path(f"{spill_prefix}.stderr"), matchers.get("stderr")),
+    }
+    pumps = [
+        threading.Thread(target=captures["stdout"].pump, args=(proc.stdout,), daemon=True),
+        threading.Thread(target=captures["stderr"].pump, args=(proc.stderr,), daemon=True),
+    ]
+    for pump in pumps:
+        pump.start()
+
+    def feed_stdin() -> None:
+        try:
+            if stdin_text:
+                proc.stdin.write(stdin_text)
+            proc.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+    feeder = threading.Thread(target=feed_stdin, daemon=True)
+    feeder.start()
+
+    timed_out = False
+    rusage: dict[str, Any] | None = None
+    if hasattr(os, "wait4") and hasattr(os, "waitid"):
+        expired = threading.Event()
+        reap_lock = threading.Lock()
+        reaped = False
+
+        def kill_on_timeout() -> None:
+            # Signal the pid directly: Popen.kill() polls first and could reap the child here.
+            with reap_lock:
+                if not reaped:
+                    expired.set()
+                    os.kill(proc.pid, signal.SIGKILL)
+
+        killer = threading.Timer(timeout_sec, kill_on_timeout)
+        killer.start()
+        # Wait for the exit without reaping, so the pid cannot be recycled while the
+        # timer may still signal it; then reap it ourselves so its resource usage is not
+        # lost to Popen.wait().
+        os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+        with reap_lock:
+            reaped = True
+            _, status, usage = os.wait4(proc.pid, 0)
+        killer.cancel()
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        timed_out = expired.is_set()
+        rusage = rusage_row(usage)
+    else:
+        try:
+            proc.wait(timeout=timeout_sec)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            proc.kill()
+            proc.wait()
+    feeder.join()
+    for pump in pumps:
+        pump.join()
+    duration_ms = int((time.monotonic() - start) * 1000)
+    result = {
+        "exit_code": -124 if timed_out else proc.returncode,
+        "stdout": captures["stdout"].text(),
+        "stderr": captures["stderr"].text(),
+        "stdout_path": str(captures["stdout"].spill_path),
+        "stderr_path": str(captures["stderr"].spill_path),
+        "stdout_chars": captures["stdout"].total_chars,
+        "stderr_chars": captures["stderr"].total_chars,
+        "timed_out": timed_out,
+        "duration_ms": duration_ms,
+    }
+    if rusage is not None:
+        result["rusage"] = rusage
+    return result
+
+
+def spill_captured_output(result: dict[str, Any], spill_prefix: Path, matchers: dict[str, StreamMatcher]) -> None:
+    """Route output captured in memory (protocol sessions) through the streaming path.
+
+    The text is written to the step's spill files and fed to the stream matchers, so
+    `full_stream_text` and streaming expectations see it like any streamed step.
+    """
+    for stream in ("stdout", "stderr"):
+        capture = BoundedCapture(Path(f"{spill_prefix}.{stream}"), matchers.get(stream))
+        capture.pump(io.StringIO(str(result.get(stream, ""))))
+        result[stream] = capture.text()
+        result[f"{stream}_path"] = str(capture.spill_path)
+        result[f"{stream}_chars"] = capture.total_chars
+
+
+def stream_expectations(expect: dict[str, Any], side: str, stream: str) -> tuple[list[str], list[str]]:
+    needles: list[str] = []
+    patterns: list[str] = []
+    blocks = [expect]
+    side_block = expect.get(side, {})
+    if isinstance(side_block, dict):
+        blocks.append(side_block)
+    for block in blocks:
+        needles.extend(str(v) for v in block.get(f"{stream}_contains", []))
+        needles.extend(str(v) for v in block.get(f"{stream}_not_contains", []))
+        patterns.extend(str(v) for v in block.get(f"{stream}_regex", []))
+    return needles, patterns
+
+
+PROTOCOL_EXIT_GRACE_SEC = 2.0
+PROTOCOL_COMPARE_MODES = {"exact", "keys", "none"}
+
+
+class ProtocolSession:
+    """One long-lived JSON-RPC server speaking newline-delimited JSON over stdio."""
+
+    def __init__(self, proc: subprocess.Popen[str]) -> None:
+        self.proc = proc
+        self.inbox: list[dict[str, Any]] = []
+        self.stdout_lines: list[str] = []
+        self.stderr_parts: list[str] = []
+        self.cond = threading.Condition()
+        self.closed = False
+        self.readers = [
+            threading.Thread(target=self.read_stdout, daemon=True),
+            threading.Thread(target=self.read_stderr, daemon=True),
+        ]
+        for reader in self.readers:
+            reader.start()
+
+    def read_stdout(self) -> None:
+        assert self.proc.stdout is not None
+        for line in self.proc.stdout:
+            received = time.monotonic()
+            try:
+                message = json.loads(line)
+            except ValueError:
+                message = None
+            with self.cond:
+                self.stdout_lines.append(line)
+                if isinstance(message, dict):
+                    self.inbox.append({"at": received, "message": message, "taken": False})
+                self.cond.notify_all()
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def read_stderr(self) -> None:
+        assert self.proc.stderr is not None
+        for chunk in self.proc.stderr:
+            self.stderr_parts.append(chunk)
+
+    def send(self, message: dict[str, Any]) -> float:
+        assert self.proc.stdin is not None
+        sent = time.monotonic()
+        self.proc.stdin.write(json.dumps(message, separators=(",", ":")) + "\n")
+        self.proc.stdin.flush()
+        return sent
+
+    def take(self, matches: Any, after: float, deadline: float) -> dict[str, Any] | None:
+        """Wait for the first unclaimed message received after `after` that `matches`."""
+        with self.cond:
+            while True:
+                for record in self.inbox:
+                    if not record["taken"] and record["at"] >= after and matches(record["message"]):
+                        record["taken"] = True
+                        return record
+                remaining = deadline - time.monotonic()
+                if self.closed or remaining <= 0:
+                    return None
+                self.cond.wait(remaining)
+
+    def claim_all(self, matches: Any) -> list[dict[str, Any]]:
+        """Remove and return every message that `matches`, taken or not.
+
+        Long-running drivers call this to keep the inbox and transcript short: records
+        already returned by `take` are dropped too, and stdout lines are not retained.
+        """
+        with self.cond:
+            keep: list[dict[str, Any]] = []
+            out: list[dict[str, Any]] = []
+            for record in self.inbox:
+                if matches(record["message"]):
+                    out.append(record)
+                elif not record["taken"]:
+                    keep.append(record)
+            self.inbox = keep
+            del self.stdout_lines[:]
+            return out
+
+
+def protocol_messages(spec: dict[str, Any]) -> list[dict[str, Any]]:
+    messages = spec.get("messages", [])
+    return [m for m in messages if isinstance(m, dict)] if isinstance(messages, list) else []
+
+
+def run_protocol_session(
+    cmd: list[str],
+    cwd: Path,
+    env: dict[str, str],
+    spec: dict[str, Any],
+    timeout_sec: int,
+    argv0: str = "",
+) -> dict[str, Any]:
+    """Drive a scripted JSON-RPC exchange against one server process.
+
+    Each message may `send` a request (awaiting the response with the same id unless
+    `expect_response` is false) or a notification, `await` notification methods, or `await_request` a server-initiated
+    request and answer it with `reply`. Latencies are measured from the send (or from
+    the previous message for pure waits) to the monotonic receive time of each line.
+    """
+    start = time.monotonic()
+    deadline = start + timeout_sec
+    run_cmd_args = list(cmd)
+    executable = None
+    if argv0 and os.name != "nt" and len(cmd) > 0:
+        executable = cmd[0]
+        run_cmd_args = [argv0, *cmd[1:]]
+    proc = subprocess.Popen(
+        run_cmd_args,
+        cwd=str(cwd),
+        env=env,
+        executable=executable,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+    )
+    session = ProtocolSession(proc)
+    transcript: list[dict[str, Any]] = []
+    timed_out = False
+    mark = start
+    try:
+        for idx, message in enumerate(protocol_messages(spec)):
+            msg_deadline = min(deadline, time.monotonic() + float(message.get("timeout_sec", timeout_sec)))
+            entry: dict[str, Any] = {"index": idx}
+            payload = message.get("send")
+            if isinstance(payload, dict):
+                entry["method"] = str(payload.get("method", ""))
+                try:
+                    mark = session.send(payload)
+                except (BrokenPipeError, OSError):
+                    entry["error"] = "server closed stdin"
+                    transcript.append(entry)
+                    break
+                if "id" in payload and "method" in payload and bool(message.get("expect_response", True)):
+                    req_id = payload["id"]
+                    record = session.take(
+                        lambda m: m.get("id") == req_id and "method" not in m,
+                        mark,
+                        msg_deadline,
+                    )
+                    if record is None:
+                        entry["error"] = f"no response for id {req_id!r}"
+                    else:
+                        entry["id"] = req_id
+                        entry["latency_ms"] = round((record["at"] - mark) * 1000, 3)
+                        entry["response"] = record["message"]
+            wanted = message.get("await_request")
+            if wanted:
+                entry["method"] = entry.get("method") or str(wanted)
+                record = session.take(lambda m: m.get("method") == wanted and "id" in m, mark, msg_deadline)
+                if record is None:
+                    entry["error"] = f"no server request {wanted!r}"
+                else:
+                    entry["latency_ms"] = round((record["at"] - mark) * 1000, 3)
+                    entry["request"] = record["message"]
+                    reply = {"jsonrpc": "2.0", "id": record["message"]["id"], "result": message.get("reply", {})}
+                    mark = session.send(reply)
+            notifications: list[dict[str, Any]] = []
+            awaited = message.get("await", [])
+            for method in awaited if isinstance(awaited, list) else [awaited]:
+                record = session.take(
+                    lambda m, method=method: m.get("method") == method and "id" not in m,
+                    mark,
+                    msg_deadline,
+                )
+                if record is None:
+                    entry.setdefault("error", f"no notification {method!r}")
+                    continue
+                notifications.append(
+                    {
+                        "method": method,
+                        "latency_ms": round((record["at"] - mark) * 1000, 3),
+                        "message": record["message"],
+                    }
+                )
+            if notifications:
+                entry["notifications"] = notifications
+            transcript.append(entry)
+            if "error" in entry and time.monotonic() >= deadline:
+                timed_out = True
+                break
+        if bool(spec.get("close_stdin", True)) and proc.stdin is not None:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+        # Servers that keep running after EOF are stopped once the grace period ends.
+        grace = min(float(spec.get("exit_grace_sec", PROTOCOL_EXIT_GRACE_SEC)), max(0.0, deadline - time.monotonic()))
+        try:
+            proc.wait(timeout=max(0.1, grace))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    for reader in session.readers:
+        reader.join(timeout=1)
+    unsolicited = [
+        record["message"].get("method", "")
+        for record in session.inbox
+        if not record["taken"] and "method" in record["message"]
+    ]
+    return {
+        "exit_code": -124 if timed_out else proc.returncode,
+        "stdout": "".join(session.stdout_lines),
+        "stderr": "".join(session.stderr_parts),
+        "timed_out": timed_out,
+        "duration_ms": int((time.monotonic() - start) * 1000),
+        "protocol": {"messages": transcript, "unsolicited": unsolicited},
+    }
+
+
 def merge_env(base_env: dict[str, str], extra_env: dict[str, Any]) -> dict[str, str]:
     out = dict(base_env)
     for key, value in extra_env.items():
@@ -275,6 +995,8 @@ def run_side_steps(
     base_cwd: Path,
     host_env: dict[str, str],
     default_timeout: int,
+    stream_output: bool = False,
+    fixtures: FixtureTemplates | None = None,
 ) -> dict[str, Any]:
     case_tmp = Path(tempfile.mkdtemp(prefix=f"parity-{case['id']}-{side}-"))
     home_dir = str(host_env.get("HOME", ""))
@@ -286,14 +1008,39 @@ def run_side_steps(
         "CODEX_HOME": codex_home,
     }
 
-    files = render_value(case.get("files", []), context)
+    # Each side gets its own mock so injected failures are counted per side.
+    mock: MockModelServer | None = None
+    if isinstance(case.get("mock_model"), dict):
+        mock = MockModelServer(config=case["mock_model"])
+        context["MOCK_MODEL_URL"] = mock.start()
+        host_env = dict(host_env)
+        for key in ("CODEX_BASE_URL", "OPENAI_BASE_URL"):
+            host_env[key] = context["MOCK_MODEL_URL"]
+        for key in ("CODEX_API_KEY", "OPENAI_API_KEY"):
+            host_env[key] = "sk-parity-mock"
+
+    files = case.get("files", [])
     if isinstance(files, list):
-        write_case_files(files, case_tmp)
+        if fixtures is not None:
+            files = fixtures.materialize(files, case_tmp)
+        write_case_files(render_value(files, context), case_tmp)
 
     commands = case.get("steps")
     if not commands:
         commands = [case]
 
+    matchers: dict[str, StreamMatcher] = {}
+    spill_dir: Path | None = None
+    if stream_output:
+        # Spill files live outside CASE_TMP so they never show up in the produced tree.
+        spill_dir = Path(tempfile.mkdtemp(prefix=f"parity-{case['id']}-{side}-out-"))
+        expect = case.get("expect", {})
+        if not isinstance(expect, dict):
+            expect = {}
+        for stream in ("stdout", "stderr"):
+            needles, patterns = stream_expectations(expect, side, stream)
+            matchers[stream] = StreamMatcher(needles, patterns)
+
     step_rows: list[dict[str, Any]] = []
     combined_stdout_parts: list[str] = []
     combined_stderr_parts: list[str] = []
@@ -335,7 +1082,24 @@ def run_side_steps(
             argv0 = str(argv0)
 
         cmd = [*base_cmd, *[str(a) for a in args]]
-        result = run_cmd(cmd, step_cwd, merged_env, stdin_text, timeout_sec, argv0=argv0)
+        protocol_spec = render_value(step_obj.get("protocol"), local_context)
+        if isinstance(protocol_spec, dict):
+            result = run_protocol_session(cmd, step_cwd, merged_env, protocol_spec, timeout_sec, argv0=argv0)
+            if spill_dir is not None:
+                spill_captured_output(result, spill_dir / f"step-{idx}", matchers)
+        elif spill_dir is not None:
+            result = run_cmd_streaming(
+                cmd,
+                step_cwd,
+                merged_env,
+                stdin_text,
+                timeout_sec,
+                spill_dir / f"step-{idx}",
+                matchers,
+                argv0=argv0,
+            )
+        else:
+            result = run_cmd(cmd, step_cwd, merged_env, stdin_text, timeout_sec, argv0=argv0)
 
         last_exit = int(result["exit_code"])
         timed_out_any = timed_out_any or bool(result["timed_out"])
@@ -355,7 +1119,7 @@ def run_side_steps(
             }
         )
 
-    return {
+    side_result = {
         "tmp_dir": str(case_tmp),
         "steps": step_rows,
         "exit_code": last_exit,
@@ -366,6 +1130,215 @@ def run_side_steps(
         "home": home_dir,
         "codex_home": codex_home,
     }
+    if spill_dir is not None:
+        for matcher in matchers.values():
+            matcher.finish()
+        side_result["spill_dir"] = str(spill_dir)
+        side_result["stream"] = {name: matcher.summary() for name, matcher in matchers.items()}
+    if mock is not None:
+        mock.stop()
+        stats = mock.stats()
+        # Time the client spent outside model responses: startup, request building, parsing.
+        stats["overhead_ms"] = round(max(0.0, total_duration - stats["served_ms"]), 3)
+        side_result["mock_model"] = stats
+    return side_result
+
+
+BASELINE_CACHE_VERSION = 3
+# Case keys that only affect evaluation or selection, never what the baseline executes.
+BASELINE_CACHE_IGNORED_KEYS = {
+    "description",
+    "expect",
+    "source_checks",
+    "platforms",
+    "serial_sides",
+    "project_independent",
+}
+# Host variables replaced per run (HOME) or describing only the invoking shell.
+BASELINE_CACHE_IGNORED_ENV = {"HOME", "OLDPWD", "PWD", "SHLVL", "_"}
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def detect_baseline_identity(baseline_cmd: list[str], codex_rs_dir: Path | None) -> str:
+    """Return a stable identity for the baseline, or "" when it cannot be pinned."""
+    if len(baseline_cmd) == 1 and Path(baseline_cmd[0]).is_file():
+        return "bin-sha256:" + file_sha256(Path(baseline_cmd[0]))
+    if codex_rs_dir is None or shutil.which("git") is None:
+        return ""
+    head = subprocess.run(
+        ["git", "-C", str(codex_rs_dir), "rev-parse", "HEAD"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    dirty = subprocess.run(
+        ["git", "-C", str(codex_rs_dir), "status", "--porcelain", "--untracked-files=no"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    # A dirty worktree is not the pinned commit; never serve cached results for it.
+    if head.returncode != 0 or dirty.returncode != 0 or dirty.stdout.strip():
+        return ""
+    return "commit:" + head.stdout.strip()
+
+
+def host_env_digest(env: dict[str, str]) -> str:
+    """Hash the host environment passed through to the baseline side."""
+    passed = {k: v for k, v in env.items() if k not in BASELINE_CACHE_IGNORED_ENV}
+    canonical = json.dumps(passed, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def project_tree_digest(project_root: Path) -> str:
+    """Hash the git state of the tree baseline steps run in, or "" when it is not a checkout.
+
+    Covers HEAD, the uncommitted diff and the untracked files (names and contents).
+    `build/` is skipped: it holds this tool's own reports and cache, which change every run.
+    """
+    if shutil.which("git") is None:
+        return ""
+    outside_build = ["--", ".", ":(exclude)build"]
+    head = subprocess.run(
+        ["git", "-C", str(project_root), "rev-parse", "HEAD"], capture_output=True, check=False
+    )
+    diff = subprocess.run(
+        ["git", "-C", str(project_root), "diff", "HEAD", "--binary", *outside_build],
+        capture_output=True,
+        check=False,
+    )
+    untracked = subprocess.run(
+        ["git", "-C", str(project_root), "ls-files", "--others", "--exclude-standard", "-z", *outside_build],
+        capture_output=True,
+        check=False,
+    )
+    if head.returncode != 0 or diff.returncode != 0 or untracked.returncode != 0:
+        return ""
+    digest = hashlib.sha256()
+    digest.update(head.stdout)
+    digest.update(diff.stdout)
+    for name in sorted(n for n in untracked.stdout.decode("utf-8", "replace").split("\0") if n):
+        digest.update(name.encode("utf-8") + b"\0")
+        path = project_root / name
+        if path.is_file():
+            digest.update(file_sha256(path).encode("ascii"))
+    return digest.hexdigest()
+
+
+def case_uses_project_tree(case: dict[str, Any]) -> bool:
+    """True when a step runs in the default cwd (the project tree) or references PROJECT_ROOT."""
+    if bool(case.get("project_independent", False)):
+        return False
+    if "{{PROJECT_ROOT}}" in json.dumps(case, ensure_ascii=False):
+        return True
+    steps = case.get("steps")
+    rows = steps if isinstance(steps, list) and steps else [case]
+    return any(not (isinstance(row, dict) and row.get("cwd")) for row in rows)
+
+
+def baseline_cache_key(
+    identity: str,
+    env_digest: str,
+    project_root: str,
+    project_tree: str,
+    case: dict[str, Any],
+    host_platform: str,
+    default_timeout: int,
+) -> str:
+    payload = {
+        "version": BASELINE_CACHE_VERSION,
+        "identity": identity,
+        "host_env": env_digest,
+        "project_root": project_root,
+        "project_tree": project_tree,
+        "host_platform": host_platform,
+        "default_timeout": default_timeout,
+        "case": {k: v for k, v in case.items() if k not in BASELINE_CACHE_IGNORED_KEYS},
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def baseline_cache_entry(cache_dir: Path, key: str) -> Path:
+    return cache_dir / key[:2] / key
+
+
+def swap_paths(value: Any, replacements: list[tuple[str, str]]) -> Any:
+    if isinstance(value, str):
+        out = value
+        for old, new in replacements:
+            if old:
+                out = out.replace(old, new)
+        return out
+    if isinstance(value, list):
+        return [swap_paths(v, replacements) for v in value]
+    if isinstance(value, dict):
+        return {k: swap_paths(v, replacements) for k, v in value.items()}
+    return value
+
+
+def store_cached_baseline(cache_dir: Path, key: str, result: dict[str, Any], project_root: str) -> None:
+    entry = baseline_cache_entry(cache_dir, key)
+    if entry.exists() or result.get("timed_out"):
+        return
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=str(entry.parent)))
+    try:
+        case_tmp = Path(str(result["tmp_dir"]))
+        if case_tmp.is_dir():
+            shutil.copytree(case_tmp, staging / "tree", symlinks=True)
+        # Store run-specific temp paths as placeholders so a restore can re-root them.
+        stored = swap_paths(
+            result,
+            [
+                (str(case_tmp), "{{CASE_TMP}}"),
+                (str(result.get("home", "")), "{{HOME}}"),
+                (project_root, "{{PROJECT_ROOT}}"),
+            ],
+        )
+        (staging / "result.json").write_text(
+            json.dumps(stored, indent=2, ensure_ascii=False) + "\n",
+            encoding="utf-8",
+        )
+        os.rename(staging, entry)
+    except OSError:
+        pass
+    finally:
+        if staging.exists():
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_cached_baseline(
+    cache_dir: Path, key: str, case_id: str, home_dir: str, project_root: str
+) -> dict[str, Any] | None:
+    entry = baseline_cache_entry(cache_dir, key)
+    result_path = entry / "result.json"
+    if not result_path.is_file():
+        return None
+    try:
+        stored = json.loads(result_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    case_tmp = Path(tempfile.mkdtemp(prefix=f"parity-{case_id}-baseline-"))
+    if (entry / "tree").is_dir():
+        shutil.copytree(entry / "tree", case_tmp, symlinks=True, dirs_exist_ok=True)
+    result = swap_paths(
+        stored, [("{{CASE_TMP}}", str(case_tmp)), ("{{HOME}}", home_dir), ("{{PROJECT_ROOT}}", project_root)]
+    )
+    result["tmp_dir"] = str(case_tmp)
+    return result
+
+
+def clear_baseline_cache(cache_dir: Path) -> None:
+    if cache_dir.exists():
+        shutil.rmtree(cache_dir)
 
 
 def evaluate_single_expectations(
@@ -374,6 +1347,11 @@ def evaluate_single_expectations(
     expect: dict[str, Any],
     failures: list[str],
 ) -> None:
+    stream_state = result.get("stream")
+    if isinstance(stream_state, dict):
+        evaluate_stream_expectations(prefix, stream_state, expect, failures)
+        return
+
     stdout = str(result.get("stdout", ""))
     stderr = str(result.get("stderr", ""))
 
@@ -395,11 +1373,197 @@ def evaluate_single_expectations(
     check_regex(f"{prefix}.stderr", stderr, [str(v) for v in expect.get("stderr_regex", [])], failures)
 
 
+def evaluate_stream_expectations(
+    prefix: str,
+    stream_state: dict[str, Any],
+    expect: dict[str, Any],
+    failures: list[str],
+) -> None:
+    for stream in ("stdout", "stderr"):
+        state = stream_state.get(stream, {})
+        found = set(state.get("found", []))
+        matched = set(state.get("matched", []))
+        label = f"{prefix}.{stream}"
+        for needle in [str(v) for v in expect.get(f"{stream}_contains", [])]:
+            if needle not in found:
+                failures.append(f"{label} missing text: {needle!r}")
+        for needle in [str(v) for v in expect.get(f"{stream}_not_contains", [])]:
+            if needle in found:
+                failures.append(f"{label} must not contain: {needle!r}")
+        for pattern in [str(v) for v in expect.get(f"{stream}_regex", [])]:
+            if pattern not in matched:
+                failures.append(f"{label} missing regex: /{pattern}/")
+
+
+def full_stream_text(result: dict[str, Any], stream: str) -> str:
+    """Return the complete stream text, reading spill files for streamed sides."""
+    if not isinstance(result.get("stream"), dict):
+        return str(result.get(stream, ""))
+    parts: list[str] = []
+    for step in result.get("steps", []):
+        spill = step.get(f"{stream}_path", "")
+        if spill and Path(spill).is_file():
+            parts.append(Path(spill).read_text(encoding="utf-8", errors="replace"))
+    return "".join(parts)
+
+
+def source_check_needles(rows: Any) -> dict[str, list[str]]:
+    needles: dict[str, list[str]] = {}
+    for row in rows if isinstance(rows, list) else []:
+        if not isinstance(row, dict):
+            continue
+        rel = str(row.get("path", "")).strip()
+        needle = str(row.get("contains", ""))
+        if rel and needle:
+            needles.setdefault(rel, []).append(needle)
+    return needles
+
+
+def evaluate_source_checks(rows: Any, source_index: ChengIndex, failures: list[str]) -> None:
+    hits = source_index.scan(source_check_needles(rows))
+    for row in rows if isinstance(rows, list) else []:
+        if not isinstance(row, dict):
+            continue
+        rel = str(row.get("path", "")).strip()
+        if not rel:
+            continue
+        needle = str(row.get("contains", ""))
+        fn_name = str(row.get("fn", "")).strip()
+        if needle:
+            found = hits.get(rel)
+            if found is None:
+                failures.append(f"source check missing file: {rel}")
+            elif needle not in found:
+                failures.append(f"source check missing text in {rel}: {needle!r}")
+        if not fn_name:
+            continue
+        if not source_index.has_fn(rel, fn_name):
+            failures.append(f"source check missing fn in {rel}: {fn_name}")
+            continue
+        entry_ref = str(row.get("reachable_from", "")).strip()
+        if entry_ref and not source_index.reachable(parse_entry_ref(entry_ref), (rel, fn_name)):
+            failures.append(f"source check fn {rel}::{fn_name} not reachable from {entry_ref}")
+
+
+def drop_paths(value: Any, paths: list[str]) -> Any:
+    """Copy `value` without the dotted `paths` (`*` matches any key or list index)."""
+
+    def drop(node: Any, parts: list[str]) -> Any:
+        if not parts:
+            return node
+        head, rest = parts[0], parts[1:]
+        if isinstance(node, dict):
+            out = {}
+            for key, child in node.items():
+                if head in ("*", key):
+                    if not rest:
+                        continue
+                    child = drop(child, rest)
+                out[key] = child
+            return out
+        if isinstance(node, list) and head == "*":
+            return [drop(child, rest) for child in node] if rest else []
+        return node
+
+    for path in paths:
+        value = drop(value, path.split("."))
+    return value
+
+
+def json_shape(value: Any) -> Any:
+    """Reduce a JSON value to its keys and value types, for `keys` comparisons."""
+    if isinstance(value, dict):
+        return {key: json_shape(child) for key, child in sorted(value.items())}
+    if isinstance(value, list):
+        return [json_shape(value[0])] if value else []
+    return type(value).__name__
+
+
+def protocol_steps(case: dict[str, Any]) -> list[tuple[int, dict[str, Any]]]:
+    steps = case.get("steps") or [case]
+    return [
+        (idx, step["protocol"])
+        for idx, step in enumerate(steps)
+        if isinstance(step, dict) and isinstance(step.get("protocol"), dict)
+    ]
+
+
+def evaluate_protocol(
+    case: dict[str, Any],
+    baseline: dict[str, Any],
+    cheng: dict[str, Any],
+    failures: list[str],
+) -> None:
+    """Compare the scripted exchange of both sides message by message."""
+    sides = {"baseline": baseline.get("steps", []), "cheng": cheng.get("steps", [])}
+    for step_idx, spec in protocol_steps(case):
+        transcripts: dict[str, list[dict[str, Any]]] = {}
+        for side, steps in sides.items():
+            row = steps[step_idx] if step_idx < len(steps) else {}
+            transcripts[side] = row.get("protocol", {}).get("messages", [])
+        default_mode = str(spec.get("compare", "keys"))
+        default_ignore = [str(p) for p in spec.get("ignore", [])]
+        for msg_idx, message in enumerate(protocol_messages(spec)):
+            label = f"protocol step[{step_idx}] message[{msg_idx}]"
+            entries: dict[str, dict[str, Any]] = {}
+            for side, transcript in transcripts.items():
+                entry = transcript[msg_idx] if msg_idx < len(transcript) else {"error": "not reached"}
+                if entry.get("error"):
+                    failures.append(f"{label} {side}: {entry['error']}")
+                entries[side] = entry
+            if any(entry.get("error") for entry in entries.values()):
+                continue
+            mode = str(message.get("compare", default_mode))
+            if mode not in PROTOCOL_COMPARE_MODES:
+                failures.append(f"{label}: unknown compare mode {mode!r}")
+                continue
+            if mode == "none":
+                continue
+            ignore = default_ignore + [str(p) for p in message.get("ignore", [])]
+            for field in ("response", "request", "notifications"):
+                if field == "notifications":
+                    note_ignore = [f"*.{path}" for path in ignore]
+                    payloads = [
+                        drop_paths([n.get("message") for n in entries[side].get(field, [])], note_ignore)
+                        for side in ("baseline", "cheng")
+                    ]
+                else:
+                    payloads = [drop_paths(entries[side].get(field), ignore) for side in ("baseline", "cheng")]
+                if mode == "keys":
+                    payloads = [json_shape(p) for p in payloads]
+                if payloads[0] != payloads[1]:
+                    failures.append(
+                        f"{label} {field} mismatch ({mode}): baseline={json.dumps(payloads[0], sort_keys=True)[:400]} "
+                        f"cheng={json.dumps(payloads[1], sort_keys=True)[:400]}"
+                    )
+
+
+def protocol_latencies(case: dict[str, Any], baseline: dict[str, Any], cheng: dict[str, Any]) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    for step_idx, _spec in protocol_steps(case):
+        per_side: dict[str, list[dict[str, Any]]] = {}
+        for side, result in (("baseline", baseline), ("cheng", cheng)):
+            steps = result.get("steps", [])
+            row = steps[step_idx] if step_idx < len(steps) else {}
+            per_side[side] = row.get("protocol", {}).get("messages", [])
+        for msg_idx in range(max(len(per_side["baseline"]), len(per_side["cheng"]))):
+            entries = {side: (msgs[msg_idx] if msg_idx < len(msgs) else {}) for side, msgs in per_side.items()}
+            method = entries["cheng"].get("method") or entries["baseline"].get("method", "")
+            row_out: dict[str, Any] = {"step": step_idx, "message": msg_idx, "method": method}
+            for side, entry in entries.items():
+                row_out[f"{side}_ms"] = entry.get("latency_ms")
+                notes = {n["method"]: n["latency_ms"] for n in entry.get("notifications", [])}
+                if notes:
+                    row_out[f"{side}_notifications_ms"] = notes
+            rows.append(row_out)
+    return rows
+
+
 def evaluate_case(
     case: dict[str, Any],
     baseline: dict[str, Any],
     cheng: dict[str, Any],
-    cheng_root: Path,
+    source_index: ChengIndex,
 ) -> list[str]:
     failures: list[str] = []
     expect = case.get("expect", {})
@@ -407,20 +1571,7 @@ def evaluate_case(
         expect = {}
 
     if case.get("source_checks"):
-        for row in case.get("source_checks", []):
-            if not isinstance(row, dict):
-                continue
-            rel = str(row.get("path", "")).strip()
-            needle = str(row.get("contains", ""))
-            if not rel or not needle:
-                continue
-            file_path = (cheng_root / rel).resolve()
-            if not file_path.exists():
-                failures.append(f"source check missing file: {rel}")
-                continue
-            text = file_path.read_text(encoding="utf-8", errors="ignore")
-            if needle not in text:
-                failures.append(f"source check missing text in {rel}: {needle!r}")
+        evaluate_source_checks(case.get("source_checks", []), source_index, failures)
 
     if not expect.get("ignore_exit_code", False):
         if expect.get("both_nonzero", False):
@@ -456,6 +1607,7 @@ def evaluate_case(
 
     evaluate_single_expectations("baseline", baseline, expect, failures)
     evaluate_single_expectations("cheng", cheng, expect, failures)
+    evaluate_protocol(case, baseline, cheng, failures)
 
     b_expect = expect.get("baseline", {})
     c_expect = expect.get("cheng", {})
@@ -480,21 +1632,90 @@ def evaluate_case(
 
     if expect.get("normalized_stdout_equal", False):
         rules = [str(v) for v in expect.get("normalizers", ["strip_ansi", "canonical_bin_name", "drop_versions", "collapse_ws", "trim"])]
-        b = norm_text(str(baseline.get("stdout", "")), rules)
-        c = norm_text(str(cheng.get("stdout", "")), rules)
+        b = norm_text(full_stream_text(baseline, "stdout"), rules)
+        c = norm_text(full_stream_text(cheng, "stdout"), rules)
         if b != c:
             failures.append("normalized stdout mismatch")
 
     if expect.get("normalized_stderr_equal", False):
         rules = [str(v) for v in expect.get("normalizers", ["strip_ansi", "canonical_bin_name", "drop_versions", "collapse_ws", "trim"])]
-        b = norm_text(str(baseline.get("stderr", "")), rules)
-        c = norm_text(str(cheng.get("stderr", "")), rules)
+        b = norm_text(full_stream_text(baseline, "stderr"), rules)
+        c = norm_text(full_stream_text(cheng, "stderr"), rules)
         if b != c:
             failures.append("normalized stderr mismatch")
 
     return failures
 
 
+def check_budget(label: str, duration_ms: int, budget: Any, failures: list[str]) -> None:
+    if budget is None:
+        return
+    if duration_ms > int(budget):
+        failures.append(f"{label} duration {duration_ms}ms exceeds budget {int(budget)}ms")
+
+
+def check_ratio(label: str, cheng_ms: int, baseline_ms: int, max_ratio: Any, failures: list[str]) -> None:
+    if max_ratio is None:
+        return
+    # Clamp the baseline so sub-millisecond runs do not turn into infinite ratios.
+    ratio = cheng_ms / max(1, baseline_ms)
+    if ratio > float(max_ratio):
+        failures.append(
+            f"{label} ratio vs baseline {ratio:.2f} exceeds {float(max_ratio):.2f} "
+            f"(cheng={cheng_ms}ms baseline={baseline_ms}ms)"
+        )
+
+
+def has_ratio_budget(case: dict[str, Any]) -> bool:
+    """True when the case or one of its steps declares `max_ratio_vs_baseline`."""
+    expect = case.get("expect", {})
+    if isinstance(expect, dict) and expect.get("max_ratio_vs_baseline") is not None:
+        return True
+    steps = case.get("steps")
+    return isinstance(steps, list) and any(
+        isinstance(step, dict) and step.get("max_ratio_vs_baseline") is not None for step in steps
+    )
+
+
+def evaluate_perf_budgets(case: dict[str, Any], baseline: dict[str, Any], cheng: dict[str, Any]) -> list[str]:
+    """Check cheng-side timing budgets; returns perf failures kept apart from functional ones."""
+    failures: list[str] = []
+    if baseline.get("timed_out") or cheng.get("timed_out"):
+        return failures
+    expect = case.get("expect", {})
+    if not isinstance(expect, dict):
+        expect = {}
+
+    cheng_ms = int(cheng.get("duration_ms", 0))
+    baseline_ms = int(baseline.get("duration_ms", 0))
+    check_budget("cheng", cheng_ms, expect.get("max_duration_ms"), failures)
+    check_ratio("cheng", cheng_ms, baseline_ms, expect.get("max_ratio_vs_baseline"), failures)
+
+    cheng_steps = cheng.get("steps", [])
+    baseline_steps = baseline.get("steps", [])
+    for step_idx, spec in protocol_steps(case):
+        transcript = cheng_steps[step_idx].get("protocol", {}).get("messages", []) if step_idx < len(cheng_steps) else []
+        for msg_idx, message in enumerate(protocol_messages(spec)):
+            if msg_idx >= len(transcript) or transcript[msg_idx].get("latency_ms") is None:
+                continue
+            label = f"cheng.step[{step_idx}].message[{msg_idx}]"
+            check_budget(label, transcript[msg_idx]["latency_ms"], message.get("max_latency_ms"), failures)
+
+    steps = case.get("steps")
+    if not isinstance(steps, list):
+        return failures
+    for idx, step in enumerate(steps):
+        if not isinstance(step, dict) or idx >= len(cheng_steps):
+            continue
+        step_cheng_ms = int(cheng_steps[idx].get("duration_ms", 0))
+        label = f"cheng.step[{idx}]"
+        check_budget(label, step_cheng_ms, step.get("max_duration_ms"), failures)
+        if idx < len(baseline_steps):
+            step_baseline_ms = int(baseline_steps[idx].get("duration_ms", 0))
+            check_ratio(label, step_cheng_ms, step_baseline_ms, step.get("max_ratio_vs_baseline"), failures)
+    return failures
+
+
 def truncate_text(text: str, limit: int = 1000) -> str:
     if len(text) <= limit:
         return text
@@ -509,14 +1730,628 @@ def select_case(case: dict[str, Any], suites: set[str], case_ids: set[str], suit
     return True
 
 
+def collect_cases(
+    scenario_files: list[Path],
+    selected_suites: set[str],
+    selected_cases: set[str],
+) -> list[tuple[str, dict[str, Any]]]:
+    planned: list[tuple[str, dict[str, Any]]] = []
+    for file_path in scenario_files:
+        suite_doc = load_json_yaml(file_path)
+        suite_name = str(suite_doc.get("suite", file_path.stem))
+        cases = suite_doc.get("cases", [])
+        if not isinstance(cases, list):
+            continue
+
+        for idx, raw_case in enumerate(cases):
+            case = raw_case if isinstance(raw_case, dict) else {}
+            case_id = str(case.get("id", f"{suite_name}-{idx}"))
+            case["id"] = case_id
+
+            if not select_case(case, selected_suites, selected_cases, suite_name):
+                continue
+            planned.append((suite_name, case))
+    return planned
+
+
+def git_changed_files(cheng_root: Path, rev: str) -> list[str]:
+    """Tracked files that differ from `rev` (working tree included) plus untracked files.
+
+    Both lists are relative to `cheng_root`, which may be a subdirectory of the git top level.
+    """
+    diff = subprocess.run(
+        ["git", "-C", str(cheng_root), "diff", "--name-only", "--relative", rev, "--"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if diff.returncode != 0:
+        raise RuntimeError(f"git diff against {rev!r} failed: {diff.stderr.strip()}")
+    untracked = subprocess.run(
+        ["git", "-C", str(cheng_root), "ls-files", "--others", "--exclude-standard"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    names = diff.stdout.splitlines()
+    if untracked.returncode == 0:
+        names.extend(untracked.stdout.splitlines())
+    return sorted({name.strip() for name in names if name.strip()})
+
+
+def module_covers(module: str, rel: str) -> bool:
+    module = module.strip().rstrip("/")
+    return bool(module) and (rel == module or rel.startswith(module + "/"))
+
+
+def select_changed_cases(
+    cheng_root: Path,
+    scenario_files: list[Path],
+    planned: list[tuple[str, dict[str, Any]]],
+    changed: list[str],
+) -> tuple[list[tuple[str, dict[str, Any]]], dict[str, Any]]:
+    """Narrow `planned` to the cases covering `changed`.
+
+    A changed file selects the scenario_refs of every behavior whose `cheng_modules`
+    cover it, of every behavior whose `source_refs` live in a crate that
+    `module_map.yaml` maps onto it, and any case whose `source_checks` read it. An edited
+    scenario file selects all of its cases. Any other file is unmapped, and a single
+    unmapped file falls back to the full plan.
+    """
+    behaviors = json.loads((cheng_root / BEHAVIOR_MANIFEST_PATH).read_text(encoding="utf-8")).get("behaviors", [])
+    mappings = json.loads((cheng_root / MODULE_MAP_PATH).read_text(encoding="utf-8")).get("mappings", [])
+    suite_by_file = {path.resolve(): str(load_json_yaml(path).get("suite", path.stem)) for path in scenario_files}
+
+    def ref_key(ref: str) -> tuple[str, str] | None:
+        file_part, _, case_id = ref.partition("::")
+        suite_name = suite_by_file.get((cheng_root / file_part).resolve())
+        if suite_name is None or not case_id:
+            return None
+        return suite_name, case_id
+
+    checked_by: dict[str, set[tuple[str, str]]] = {}
+    for suite_name, case in planned:
+        rows = case.get("source_checks", [])
+        for row in rows if isinstance(rows, list) else []:
+            rel = str(row.get("path", "")).strip() if isinstance(row, dict) else ""
+            if rel:
+                checked_by.setdefault(rel, set()).add((suite_name, str(case["id"])))
+
+    selected: set[tuple[str, str]] = set()
+    selected_suites: set[str] = set()
+    unmapped: list[str] = []
+    for rel in changed:
+        if rel.startswith(CHANGE_IGNORED_DIRS) or Path(rel).name in CHANGE_IGNORED_NAMES:
+            continue
+        suite_name = suite_by_file.get((cheng_root / rel).resolve())
+        if suite_name is not None:
+            selected_suites.add(suite_name)
+            continue
+        crates = {
+            str(row.get("crate", ""))
+            for row in mappings
+            if isinstance(row, dict) and any(module_covers(m, rel) for m in row.get("cheng_modules", []))
+        }
+        refs: list[str] = []
+        for behavior in behaviors:
+            if not isinstance(behavior, dict):
+                continue
+            by_module = any(module_covers(m, rel) for m in behavior.get("cheng_modules", []))
+            by_crate = any(
+                str(src).startswith(f"codex-rs/{crate}/") for crate in crates for src in behavior.get("source_refs", [])
+            )
+            if by_module or by_crate:
+                refs.extend(str(ref) for ref in behavior.get("scenario_refs", []))
+        keys = {key for key in (ref_key(ref) for ref in refs) if key is not None}
+        keys |= checked_by.get(rel, set())
+        if not keys:
+            unmapped.append(rel)
+        selected |= keys
+
+    info: dict[str, Any] = {"changed_files": changed, "unmapped": unmapped}
+    if unmapped:
+        info["mode"] = "full"
+        return planned, info
+    narrowed = [
+        (suite_name, case)
+        for suite_name, case in planned
+        if suite_name in selected_suites or (suite_name, str(case["id"])) in selected
+    ]
+    info["mode"] = "selected"
+    return narrowed, info
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    index_text, sep, count_text = spec.partition("/")
+    try:
+        index, count = int(index_text), int(count_text)
+    except ValueError:
+        index, count = 0, 0
+    if not sep or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"invalid --shard {spec!r}; expected i/n with 1 <= i <= n")
+    return index, count
+
+
+def load_case_durations(path: Path) -> dict[tuple[str, str], int]:
+    if not path.is_file():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    durations: dict[tuple[str, str], int] = {}
+    for row in data.get("results", []) if isinstance(data, dict) else []:
+        if isinstance(row, dict) and isinstance(row.get("duration_ms"), int):
+            durations[(str(row.get("suite", "")), str(row.get("id", "")))] = row["duration_ms"]
+    return durations
+
+
+def shard_cases(
+    planned: list[tuple[str, dict[str, Any]]],
+    index: int,
+    count: int,
+    durations: dict[tuple[str, str], int],
+) -> tuple[list[int], int, bool]:
+    """Pick the plan positions for shard `index` of `count`.
+
+    With timings, cases are dealt longest first onto the least loaded shard (ties go to
+    the lowest shard). A case the timings do not cover costs the median of the covered
+    ones, so every node sharing the file still derives the same split. Without any
+    timing for the plan, it is split round-robin by position.
+    Returns the positions, the estimated load, and whether timings were used.
+    """
+    keys = [(suite_name, str(case["id"])) for suite_name, case in planned]
+    known = [durations[key] for key in keys if key in durations]
+    if not known:
+        return [pos for pos in range(len(planned)) if pos % count == index - 1], 0, False
+    default_cost = int(statistics.median_low(known))
+    costs = [durations.get(key, default_cost) for key in keys]
+    order = sorted(range(len(planned)), key=lambda pos: (-costs[pos], keys[pos]))
+    loads = [0] * count
+    owner = [0] * len(planned)
+    for pos in order:
+        target = min(range(count), key=lambda shard: (loads[shard], shard))
+        loads[target] += costs[pos]
+        owner[pos] = target
+    return [pos for pos in range(len(planned)) if owner[pos] == index - 1], loads[index - 1], True
+
+
+def render_report_text(report: dict[str, Any]) -> str:
+    summary = report["summary"]
+    lines: list[str] = []
+    lines.append("Parity report")
+    lines.append(f"- generated_at: {report['generated_at']}")
+    lines.append(f"- host_platform: {report['host_platform']}")
+    lines.append(f"- total: {summary['total']}")
+    lines.append(f"- pass: {summary['pass']}")
+    lines.append(f"- fail: {summary['fail']}")
+    lines.append(f"- skip: {summary['skip']}")
+    lines.append(f"- perf_fail: {summary.get('perf_fail', 0)}")
+    baseline_cache = report.get("baseline_cache", {})
+    if baseline_cache.get("enabled"):
+        lines.append(f"- baseline_cache_hits: {baseline_cache.get('hits', 0)}")
+    baseline_build = report.get("baseline_build", {})
+    if baseline_build.get("mode") == "prebuilt":
+        cached_note = " (cached)" if baseline_build.get("cached") else ""
+        lines.append(f"- baseline_build_ms: {baseline_build.get('build_ms', 0)}{cached_note}")
+    lines.append(f"- scenario_ms: {report.get('scenario_ms', 0)}")
+    change_selection = report.get("change_selection")
+    if change_selection is not None:
+        if change_selection["mode"] == "full":
+            unmapped_note = ", ".join(change_selection["unmapped"])
+            lines.append(f"- change_selection: full run (unmapped: {unmapped_note})")
+        else:
+            lines.append(
+                f"- change_selection: {change_selection['selected']}/{change_selection['planned']} cases "
+                f"for {len(change_selection['changed_files'])} changed file(s)"
+            )
+    shard = report.get("shard")
+    if shard is not None:
+        lines.append(
+            f"- shard: {shard['index']}/{shard['count']} "
+            f"({len(shard['positions'])}/{shard['planned']} cases, "
+            + (f"estimated_ms={shard['estimated_ms']})" if shard.get("balanced") else "round-robin)")
+        )
+    merged_from = report.get("merged_from")
+    if merged_from:
+        lines.append(f"- merged_from: {len(merged_from)} shard report(s)")
+    lines.append("")
+    for row in report["results"]:
+        lines.append(f"[{row['status']}] {row['suite']}::{row['id']}")
+        if row.get("reasons"):
+            for reason in row["reasons"]:
+                lines.append(f"  - {reason}")
+    return "\n".join(lines) + "\n"
+
+
+def skip_row(suite_name: str, case: dict[str, Any], reasons: list[str], started: float) -> dict[str, Any]:
+    return {
+        "suite": suite_name,
+        "id": str(case["id"]),
+        "description": str(case.get("description", "")),
+        "status": "skip",
+        "reasons": reasons,
+        "duration_ms": int((time.monotonic() - started) * 1000),
+    }
+
+
+def isolated_host_env(prefix: str) -> dict[str, str]:
+    host_env = dict(os.environ)
+    # Default to isolated HOME for deterministic config/auth behavior.
+    host_env["HOME"] = tempfile.mkdtemp(prefix=prefix)
+    return host_env
+
+
+def side_report(side: dict[str, Any]) -> dict[str, Any]:
+    out = {
+        "exit_code": side.get("exit_code"),
+        "timed_out": side.get("timed_out"),
+        "duration_ms": side.get("duration_ms"),
+        "stdout": truncate_text(str(side.get("stdout", ""))),
+        "stderr": truncate_text(str(side.get("stderr", ""))),
+        "steps": side.get("steps", []),
+    }
+    if "mock_model" in side:
+        out["mock_model"] = side["mock_model"]
+    return out
+
+
+def run_case(
+    suite_name: str,
+    case: dict[str, Any],
+    host_platform: str,
+    baseline_cmd: list[str],
+    baseline_default_cwd: Path,
+    baseline_direct_bin: bool,
+    cheng_bin: Path,
+    cheng_root: Path,
+    default_timeout: int,
+    serial_sides: bool,
+    baseline_cache: dict[str, Any] | None,
+    stream_output: bool,
+    source_index: ChengIndex,
+    fixtures: FixtureTemplates | None = None,
+    keep_tmp: str = "never",
+) -> dict[str, Any]:
+    case_id = str(case["id"])
+    started = time.monotonic()
+    if not platform_allowed(case, host_platform):
+        return skip_row(suite_name, case, [f"platform {host_platform} not in {case.get('platforms')}"], started)
+    if bool(case.get("requires_direct_bin", False)) and not baseline_direct_bin:
+        reasons = ["requires direct codex-rs binary (--codex-rs-bin or target/debug/codex) for argv0 scenario"]
+        return skip_row(suite_name, case, reasons, started)
+
+    if serial_sides or bool(case.get("serial_sides", False)):
+        # Both sides share one HOME, exactly as a sequential run would.
+        baseline_env = isolated_host_env(f"parity-home-{case_id}-")
+        cheng_env = baseline_env
+    else:
+        # Concurrent sides get separate HOMEs so neither observes the other's writes.
+        baseline_env = isolated_host_env(f"parity-home-{case_id}-baseline-")
+        cheng_env = isolated_host_env(f"parity-home-{case_id}-cheng-")
+    # A ratio budget divides by the baseline's wall clock, so both sides must really run
+    # and must not compete for the CPU.
+    ratio_case = has_ratio_budget(case)
+    sequential = cheng_env is baseline_env or ratio_case
+
+    stream_case = stream_output or bool(case.get("stream_output", False))
+    protocol_case = bool(protocol_steps(case))
+    cache_key = ""
+    # Streamed sides keep their full output in spill files, which the cache does not carry;
+    # protocol sessions are replayed live so both sides' latencies are measured together,
+    # and ratio budgets need a baseline timed in this run. Steps run in the project tree
+    # see its files and git state; without a digest of that tree (not a git checkout)
+    # such cases are never served from the cache.
+    project_root = str(baseline_default_cwd)
+    project_tree = ""
+    if baseline_cache is not None and case_uses_project_tree(case):
+        project_tree = baseline_cache["project_tree"] or "unpinned"
+    cacheable = not stream_case and not protocol_case and not ratio_case
+    if baseline_cache is not None and cacheable and project_tree != "unpinned":
+        cache_key = baseline_cache_key(
+            baseline_cache["identity"],
+            baseline_cache["env"],
+            project_root,
+            project_tree,
+            case,
+            host_platform,
+            default_timeout,
+        )
+
+    def run_baseline() -> dict[str, Any]:
+        if cache_key:
+            cached = load_cached_baseline(baseline_cache["dir"], cache_key, case_id, baseline_env["HOME"], project_root)
+            if cached is not None:
+                cached["cached"] = True
+                return cached
+        result = run_side_steps(
+            "baseline",
+            case,
+            baseline_cmd,
+            baseline_default_cwd,
+            baseline_env,
+            default_timeout,
+            stream_output=stream_case,
+            fixtures=fixtures,
+        )
+        if cache_key:
+            store_cached_baseline(baseline_cache["dir"], cache_key, result, project_root)
+        result["cached"] = False
+        return result
+
+    def run_cheng() -> dict[str, Any]:
+        return run_side_steps(
+            "cheng",
+            case,
+            [str(cheng_bin)],
+            cheng_root,
+            cheng_env,
+            default_timeout,
+            stream_output=stream_case,
+            fixtures=fixtures,
+        )
+
+    if sequential:
+        baseline = run_baseline()
+        cheng = run_cheng()
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+            baseline_future = pool.submit(run_baseline)
+            cheng_future = pool.submit(run_cheng)
+            baseline = baseline_future.result()
+            cheng = cheng_future.result()
+
+    failures = evaluate_case(case, baseline, cheng, source_index)
+    perf_failures = evaluate_perf_budgets(case, baseline, cheng)
+    if failures:
+        status = "fail"
+    elif perf_failures:
+        status = "perf_fail"
+    else:
+        status = "pass"
+
+    row = {
+        "suite": suite_name,
+        "id": case_id,
+        "description": str(case.get("description", "")),
+        "status": status,
+        "reasons": failures + perf_failures,
+        "duration_ms": int((time.monotonic() - started) * 1000),
+        "baseline": {**side_report(baseline), "cached": bool(baseline.get("cached", False))},
+        "cheng": side_report(cheng),
+    }
+    if protocol_case:
+        row["protocol_latency"] = protocol_latencies(case, baseline, cheng)
+    if keep_tmp == "always" or (keep_tmp == "failed" and status != "pass"):
+        row["kept_tmp"] = sorted(
+            {str(side[key]) for side in (baseline, cheng) for key in ("tmp_dir", "spill_dir") if side.get(key)}
+            | {baseline_env["HOME"], cheng_env["HOME"]}
+        )
+    else:
+        discard_side_dirs(baseline, baseline_env["HOME"])
+        discard_side_dirs(cheng, cheng_env["HOME"])
+    return row
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def sample_stats(values: list[float]) -> dict[str, Any]:
+    if not values:
+        return {"samples": [], "min": 0, "median": 0, "p90": 0, "p99": 0, "max": 0, "stddev": 0}
+    return {
+        "samples": values,
+        "min": min(values),
+        "median": round(statistics.median(values), 3),
+        "p90": round(percentile(values, 0.90), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "max": max(values),
+        "stddev": round(statistics.stdev(values), 3) if len(values) > 1 else 0.0,
+    }
+
+
+def latency_summary(values: list[float]) -> dict[str, Any]:
+    """Compact percentile summary (no raw samples) for load and throughput tools."""
+    if not values:
+        return {"count": 0, "p50": 0, "p99": 0, "max": 0}
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 0.50), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "max": round(max(values), 3),
+    }
+
+
+def discard_side_dirs(side: dict[str, Any], home_dir: str) -> None:
+    for key in ("tmp_dir", "spill_dir"):
+        if side.get(key):
+            shutil.rmtree(str(side[key]), ignore_errors=True)
+    if home_dir:
+        shutil.rmtree(home_dir, ignore_errors=True)
+
+
+def evict_page_cache(path: Path, drop_cmd: str) -> str:
+    """Drop `path` from the OS page cache; returns the method used or "" if unsupported."""
+    if drop_cmd:
+        proc = subprocess.run(drop_cmd, shell=True, capture_output=True, check=False)
+        return "command" if proc.returncode == 0 else ""
+    if not hasattr(os, "posix_fadvise") or not path.is_file():
+        return ""
+    fd = os.open(str(path), os.O_RDONLY)
+    try:
+        # Clean pages of a file we can read may be evicted without privileges.
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return "fadvise"
+
+
+def bench_side(
+    side: str,
+    case: dict[str, Any],
+    base_cmd: list[str],
+    base_cwd: Path,
+    default_timeout: int,
+    warmup: int,
+    runs: int,
+    cold_runs: int = 0,
+    drop_cmd: str = "",
+) -> dict[str, Any]:
+    durations: list[float] = []
+    served: list[float] = []
+    overhead: list[float] = []
+    step_usage: dict[int, dict[str, list[float]]] = {}
+    exit_codes: set[int] = set()
+    timed_out = 0
+
+    cold_durations: list[float] = []
+    cold_method = ""
+    for _ in range(cold_runs):
+        cold_method = evict_page_cache(Path(base_cmd[0]), drop_cmd)
+        if not cold_method:
+            break
+        host_env = isolated_host_env(f"parity-bench-home-{case['id']}-{side}-")
+        result = run_side_steps(side, case, base_cmd, base_cwd, host_env, default_timeout, stream_output=True)
+        discard_side_dirs(result, host_env["HOME"])
+        cold_durations.append(float(result["duration_ms"]))
+
+    for iteration in range(warmup + runs):
+        host_env = isolated_host_env(f"parity-bench-home-{case['id']}-{side}-")
+        result = run_side_steps(side, case, base_cmd, base_cwd, host_env, default_timeout, stream_output=True)
+        discard_side_dirs(result, host_env["HOME"])
+        if iteration < warmup:
+            continue
+        durations.append(float(result["duration_ms"]))
+        exit_codes.add(int(result["exit_code"]))
+        timed_out += 1 if result.get("timed_out") else 0
+        mock_stats = result.get("mock_model")
+        if isinstance(mock_stats, dict):
+            served.append(float(mock_stats["served_ms"]))
+            overhead.append(float(mock_stats["overhead_ms"]))
+        for step in result.get("steps", []):
+            usage = step.get("rusage")
+            if not isinstance(usage, dict):
+                continue
+            row = step_usage.setdefault(int(step["index"]), {"user_ms": [], "sys_ms": [], "max_rss_kb": []})
+            for key in row:
+                row[key].append(float(usage[key]))
+    out = {
+        "duration_ms": sample_stats(durations),
+        "cold_duration_ms": sample_stats(cold_durations),
+        "cold_cache_method": cold_method or ("unsupported" if cold_runs > 0 else ""),
+        "exit_codes": sorted(exit_codes),
+        "timed_out_runs": timed_out,
+        "steps": [
+            {"index": idx, **{key: sample_stats(vals) for key, vals in row.items()}}
+            for idx, row in sorted(step_usage.items())
+        ],
+    }
+    if served:
+        out["model_served_ms"] = sample_stats(served)
+        out["overhead_ms"] = sample_stats(overhead)
+    return out
+
+
+def run_bench(
+    planned: list[tuple[str, dict[str, Any]]],
+    host_platform: str,
+    baseline_cmd: list[str],
+    baseline_default_cwd: Path,
+    baseline_direct_bin: bool,
+    cheng_bin: Path,
+    cheng_root: Path,
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    """Repeat each case per side (serially) and summarize timing and rusage distributions."""
+    rows: list[dict[str, Any]] = []
+    for suite_name, case in planned:
+        row: dict[str, Any] = {"suite": suite_name, "id": str(case["id"])}
+        if not platform_allowed(case, host_platform):
+            rows.append({**row, "status": "skip", "reason": f"platform {host_platform} not supported"})
+            continue
+        if bool(case.get("requires_direct_bin", False)) and not baseline_direct_bin:
+            rows.append({**row, "status": "skip", "reason": "requires direct codex-rs binary"})
+            continue
+        baseline = bench_side(
+            "baseline",
+            case,
+            baseline_cmd,
+            baseline_default_cwd,
+            args.timeout_sec,
+            args.bench_warmup,
+            args.bench_runs,
+            args.bench_cold_runs,
+            args.bench_drop_caches_cmd,
+        )
+        cheng = bench_side(
+            "cheng",
+            case,
+            [str(cheng_bin)],
+            cheng_root,
+            args.timeout_sec,
+            args.bench_warmup,
+            args.bench_runs,
+            args.bench_cold_runs,
+            args.bench_drop_caches_cmd,
+        )
+        baseline_median = float(baseline["duration_ms"]["median"])
+        cheng_median = float(cheng["duration_ms"]["median"])
+        rows.append(
+            {
+                **row,
+                "status": "ok",
+                "baseline": baseline,
+                "cheng": cheng,
+                "median_ratio_vs_baseline": round(cheng_median / max(1.0, baseline_median), 3),
+            }
+        )
+    return {
+        "version": 1,
+        "generated_at": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "host_platform": host_platform,
+        "host": {
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count() or 0,
+        },
+        "codex_rs_cmd": baseline_cmd,
+        "cheng_cmd": [str(cheng_bin)],
+        "warmup": args.bench_warmup,
+        "runs": args.bench_runs,
+        "cold_runs": args.bench_cold_runs,
+        "cases": rows,
+    }
+
+
 def main() -> int:
     args = parse_args()
     cheng_root = Path(args.cheng_root).resolve()
     host_platform = to_platform_name()
+    if args.tmp_root:
+        tmp_root = Path(args.tmp_root).resolve()
+        tmp_root.mkdir(parents=True, exist_ok=True)
+        # Every mkdtemp in this run (case dirs, HOMEs, spill dirs) lands under tmp_root.
+        tempfile.tempdir = str(tmp_root)
 
     codex_rs_dir = detect_codex_rs_dir(cheng_root, args.codex_rs_dir)
     cheng_bin = detect_cheng_bin(cheng_root, args.cheng_bin)
     baseline_cmd, baseline_default_cwd = detect_codex_rs_runner(cheng_root, codex_rs_dir, args.codex_rs_bin)
+    baseline_build: dict[str, Any] = {"mode": "direct", "cached": False, "build_ms": 0}
+    if len(baseline_cmd) > 1:
+        baseline_build = {"mode": "cargo-run", "cached": False, "build_ms": 0}
+        if not args.no_prebuild_baseline and codex_rs_dir is not None:
+            bin_cache = Path(args.baseline_bin_cache_dir)
+            if not bin_cache.is_absolute():
+                bin_cache = cheng_root / bin_cache
+            prebuilt, baseline_build = prebuild_codex_rs_bin(codex_rs_dir, bin_cache)
+            baseline_cmd, baseline_default_cwd = [str(prebuilt)], cheng_root
     baseline_direct_bin = len(baseline_cmd) == 1 and Path(baseline_cmd[0]).exists()
 
     scenarios_dir = Path(args.scenarios_dir)
@@ -526,114 +2361,130 @@ def main() -> int:
     if not scenario_files:
         raise FileNotFoundError(f"no scenarios found in {scenarios_dir}")
 
-    results: list[dict[str, Any]] = []
-    pass_count = 0
-    fail_count = 0
-    skip_count = 0
+    baseline_cache_dir = Path(args.baseline_cache_dir)
+    if not baseline_cache_dir.is_absolute():
+        baseline_cache_dir = cheng_root / baseline_cache_dir
+    if args.clear_baseline_cache:
+        clear_baseline_cache(baseline_cache_dir)
+    baseline_cache: dict[str, Any] | None = None
+    baseline_identity = ""
+    if not args.no_baseline_cache:
+        baseline_identity = detect_baseline_identity(baseline_cmd, codex_rs_dir)
+        if baseline_identity:
+            baseline_cache = {
+                "dir": baseline_cache_dir,
+                "identity": baseline_identity,
+                "env": host_env_digest(dict(os.environ)),
+                "project_tree": project_tree_digest(baseline_default_cwd),
+            }
 
     selected_suites = {s.strip() for s in args.suite if s.strip()}
     selected_cases = {c.strip() for c in args.case if c.strip()}
+    planned = collect_cases(scenario_files, selected_suites, selected_cases)
+
+    change_selection: dict[str, Any] | None = None
+    if args.changed_since or args.changed_files:
+        changed = [Path(p).as_posix() for p in args.changed_files if p.strip()]
+        if args.changed_since:
+            changed.extend(git_changed_files(cheng_root, args.changed_since))
+        planned_total = len(planned)
+        planned, change_selection = select_changed_cases(
+            cheng_root, scenario_files, planned, sorted(set(changed))
+        )
+        change_selection["since"] = args.changed_since
+        change_selection["selected"] = len(planned)
+        change_selection["planned"] = planned_total
+
+    shard: dict[str, Any] | None = None
+    if args.shard:
+        shard_index, shard_count = parse_shard(args.shard)
+        durations: dict[tuple[str, str], int] = {}
+        timings_path: Path | None = None
+        if args.shard_timings:
+            timings_path = Path(args.shard_timings)
+            if not timings_path.is_absolute():
+                timings_path = cheng_root / timings_path
+            durations = load_case_durations(timings_path)
+        positions, estimated_ms, balanced = shard_cases(planned, shard_index, shard_count, durations)
+        shard = {
+            "index": shard_index,
+            "count": shard_count,
+            "planned": len(planned),
+            "positions": positions,
+            "estimated_ms": estimated_ms,
+            "balanced": balanced,
+            "timings": str(timings_path) if timings_path is not None else "",
+        }
+        planned = [planned[pos] for pos in positions]
+
+    source_index = ChengIndex(cheng_root, cheng_root / CHENG_INDEX_PATH)
+    # Answer every case's source snippet checks with one scan per file up front.
+    all_needles: dict[str, list[str]] = {}
+    for _suite_name, case in planned:
+        for rel, needles in source_check_needles(case.get("source_checks", [])).items():
+            all_needles.setdefault(rel, []).extend(needles)
+    source_index.scan(all_needles)
+
+    if args.bench:
+        bench = run_bench(
+            planned,
+            host_platform,
+            baseline_cmd,
+            baseline_default_cwd,
+            baseline_direct_bin,
+            cheng_bin,
+            cheng_root,
+            args,
+        )
+        bench["baseline_build"] = baseline_build
+        bench_out = Path(args.bench_out)
+        if not bench_out.is_absolute():
+            bench_out = cheng_root / bench_out
+        bench_out.parent.mkdir(parents=True, exist_ok=True)
+        bench_out.write_text(json.dumps(bench, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(str(bench_out))
+        return 0
+
+    fixtures = FixtureTemplates(Path(tempfile.mkdtemp(prefix="parity-fixtures-")))
+
+    def run_planned(item: tuple[str, dict[str, Any]]) -> dict[str, Any]:
+        suite_name, case = item
+        return run_case(
+            suite_name,
+            case,
+            host_platform,
+            baseline_cmd,
+            baseline_default_cwd,
+            baseline_direct_bin,
+            cheng_bin,
+            cheng_root,
+            args.timeout_sec,
+            args.serial_sides,
+            baseline_cache,
+            args.stream_output,
+            source_index,
+            fixtures,
+            args.keep_tmp,
+        )
 
-    for file_path in scenario_files:
-        suite_doc = load_json_yaml(file_path)
-        suite_name = str(suite_doc.get("suite", file_path.stem))
-        cases = suite_doc.get("cases", [])
-        if not isinstance(cases, list):
-            continue
-
-        for idx, raw_case in enumerate(cases):
-            case = raw_case if isinstance(raw_case, dict) else {}
-            case_id = str(case.get("id", f"{suite_name}-{idx}"))
-            case["id"] = case_id
-
-            if not select_case(case, selected_suites, selected_cases, suite_name):
-                continue
-
-            started = time.monotonic()
-            if not platform_allowed(case, host_platform):
-                status = "skip"
-                reasons = [f"platform {host_platform} not in {case.get('platforms')}"]
-                row = {
-                    "suite": suite_name,
-                    "id": case_id,
-                    "description": str(case.get("description", "")),
-                    "status": status,
-                    "reasons": reasons,
-                    "duration_ms": int((time.monotonic() - started) * 1000),
-                }
-                results.append(row)
-                skip_count += 1
-                continue
-            if bool(case.get("requires_direct_bin", False)) and not baseline_direct_bin:
-                status = "skip"
-                reasons = ["requires direct codex-rs binary (--codex-rs-bin or target/debug/codex) for argv0 scenario"]
-                row = {
-                    "suite": suite_name,
-                    "id": case_id,
-                    "description": str(case.get("description", "")),
-                    "status": status,
-                    "reasons": reasons,
-                    "duration_ms": int((time.monotonic() - started) * 1000),
-                }
-                results.append(row)
-                skip_count += 1
-                continue
-
-            host_env = dict(os.environ)
-            # Default to isolated HOME for deterministic config/auth behavior.
-            temp_home = Path(tempfile.mkdtemp(prefix=f"parity-home-{case_id}-"))
-            host_env["HOME"] = str(temp_home)
-
-            baseline = run_side_steps(
-                "baseline",
-                case,
-                baseline_cmd,
-                baseline_default_cwd,
-                host_env,
-                args.timeout_sec,
-            )
-            cheng = run_side_steps(
-                "cheng",
-                case,
-                [str(cheng_bin)],
-                cheng_root,
-                host_env,
-                args.timeout_sec,
-            )
+    scenarios_started = time.monotonic()
+    jobs = max(1, int(args.jobs))
+    try:
+        if jobs > 1 and len(planned) > 1:
+            # Executor.map yields in submission order, so the report matches a serial run.
+            with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(run_planned, planned))
+        else:
+            results = [run_planned(item) for item in planned]
+    finally:
+        fixtures.cleanup()
 
-            failures = evaluate_case(case, baseline, cheng, cheng_root)
-            status = "pass" if not failures else "fail"
-
-            row = {
-                "suite": suite_name,
-                "id": case_id,
-                "description": str(case.get("description", "")),
-                "status": status,
-                "reasons": failures,
-                "duration_ms": int((time.monotonic() - started) * 1000),
-                "baseline": {
-                    "exit_code": baseline.get("exit_code"),
-                    "timed_out": baseline.get("timed_out"),
-                    "duration_ms": baseline.get("duration_ms"),
-                    "stdout": truncate_text(str(baseline.get("stdout", ""))),
-                    "stderr": truncate_text(str(baseline.get("stderr", ""))),
-                    "steps": baseline.get("steps", []),
-                },
-                "cheng": {
-                    "exit_code": cheng.get("exit_code"),
-                    "timed_out": cheng.get("timed_out"),
-                    "duration_ms": cheng.get("duration_ms"),
-                    "stdout": truncate_text(str(cheng.get("stdout", ""))),
-                    "stderr": truncate_text(str(cheng.get("stderr", ""))),
-                    "steps": cheng.get("steps", []),
-                },
-            }
-            results.append(row)
+    scenario_ms = int((time.monotonic() - scenarios_started) * 1000)
 
-            if status == "pass":
-                pass_count += 1
-            else:
-                fail_count += 1
+    pass_count = sum(1 for row in results if row["status"] == "pass")
+    fail_count = sum(1 for row in results if row["status"] == "fail")
+    skip_count = sum(1 for row in results if row["status"] == "skip")
+    perf_fail_count = sum(1 for row in results if row["status"] == "perf_fail")
 
     if args.fail_on_skip and skip_count > 0:
         fail_count += skip_count
@@ -643,7 +2494,9 @@ def main() -> int:
         "pass": pass_count,
         "fail": fail_count,
         "skip": skip_count,
+        "perf_fail": perf_fail_count,
     }
+    cache_hits = sum(1 for row in results if row.get("baseline", {}).get("cached"))
 
     report = {
         "version": 1,
@@ -653,9 +2506,23 @@ def main() -> int:
         "codex_rs_dir": str(codex_rs_dir) if codex_rs_dir else "",
         "codex_rs_cmd": baseline_cmd,
         "cheng_cmd": [str(cheng_bin)],
+        "baseline_build": baseline_build,
+        "scenario_ms": scenario_ms,
+        "baseline_cache": {
+            "enabled": baseline_cache is not None,
+            "dir": str(baseline_cache_dir),
+            "identity": baseline_identity,
+            "hits": cache_hits,
+        },
         "summary": summary,
         "results": results,
     }
+    if change_selection is not None:
+        report["change_selection"] = change_selection
+    if shard is not None:
+        report["shard"] = shard
+
+    source_index.save()
 
     out_json = Path(args.out_json)
     if not out_json.is_absolute():
@@ -669,26 +2536,16 @@ def main() -> int:
 
     out_json.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
 
-    lines: list[str] = []
-    lines.append("Parity report")
-    lines.append(f"- generated_at: {report['generated_at']}")
-    lines.append(f"- host_platform: {host_platform}")
-    lines.append(f"- total: {summary['total']}")
-    lines.append(f"- pass: {summary['pass']}")
-    lines.append(f"- fail: {summary['fail']}")
-    lines.append(f"- skip: {summary['skip']}")
-    lines.append("")
-    for row in results:
-        lines.append(f"[{row['status']}] {row['suite']}::{row['id']}")
-        if row.get("reasons"):
-            for reason in row["reasons"]:
-                lines.append(f"  - {reason}")
-    out_txt.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    out_txt.write_text(render_report_text(report), encoding="utf-8")
 
     print(str(out_json))
     print(str(out_txt))
 
-    return 1 if summary["fail"] > 0 else 0
+    if summary["fail"] > 0:
+        return 1
+    if summary["perf_fail"] > 0 and not args.perf_advisory:
+        return 1
+    return 0
 
 
 if __name__ == "__main__":
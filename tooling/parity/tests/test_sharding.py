@@ -0,0 +1,105 @@
+"""Tests for `run_parity.py --shard` planning and `merge_reports.py`."""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from merge_reports import merge_reports  # noqa: E402
+from run_parity import shard_cases  # noqa: E402
+
+
+def plan(*ids: str) -> list[tuple[str, dict]]:
+    return [("cli", {"id": case_id}) for case_id in ids]
+
+
+def timings(**costs: int) -> dict[tuple[str, str], int]:
+    return {("cli", case_id): cost for case_id, cost in costs.items()}
+
+
+def shard_report(index: int, count: int, positions: list[int], ids: list[str], summary: dict | None = None) -> dict:
+    return {
+        "shard": {"index": index, "count": count, "positions": positions},
+        "scenario_ms": 10 * index,
+        "summary": summary or {},
+        "results": [{"suite": "cli", "id": case_id} for case_id in ids],
+    }
+
+
+class ShardCasesTest(unittest.TestCase):
+    def test_round_robin_without_timings(self) -> None:
+        planned = plan("a", "b", "c", "d", "e")
+        self.assertEqual(shard_cases(planned, 1, 2, {}), ([0, 2, 4], 0, False))
+        self.assertEqual(shard_cases(planned, 2, 2, {}), ([1, 3], 0, False))
+
+    def test_longest_first_onto_least_loaded(self) -> None:
+        planned = plan("a", "b", "c", "d")
+        durations = timings(a=10, b=70, c=40, d=30)
+        # b -> 1, c -> 2, d -> 2 (40 < 70), a -> 1 (70 == 70, lowest shard wins).
+        self.assertEqual(shard_cases(planned, 1, 2, durations), ([0, 1], 80, True))
+        self.assertEqual(shard_cases(planned, 2, 2, durations), ([2, 3], 70, True))
+
+    def test_equal_costs_break_ties_by_case_key(self) -> None:
+        planned = plan("c", "a", "b")
+        durations = timings(a=5, b=5, c=5)
+        # Dealt in key order a, b, c onto shards 1, 2, 1.
+        self.assertEqual(shard_cases(planned, 1, 2, durations), ([0, 1], 10, True))
+        self.assertEqual(shard_cases(planned, 2, 2, durations), ([2], 5, True))
+
+    def test_untimed_cases_cost_the_median(self) -> None:
+        planned = plan("a", "b", "c", "new")
+        durations = timings(a=100, b=10, c=50)
+        # "new" costs 50: a -> 1, c -> 2, new -> 2, b -> 1 (100 == 100, lowest shard wins).
+        self.assertEqual(shard_cases(planned, 1, 2, durations), ([0, 1], 110, True))
+        self.assertEqual(shard_cases(planned, 2, 2, durations), ([2, 3], 100, True))
+
+    def test_shards_partition_the_plan(self) -> None:
+        planned = plan(*"abcdefghij")
+        durations = timings(a=9, c=3, d=7, f=1, g=4, j=8)
+        seen: list[int] = []
+        for index in range(1, 4):
+            seen.extend(shard_cases(planned, index, 3, durations)[0])
+        self.assertEqual(sorted(seen), list(range(len(planned))))
+
+
+class MergeReportsTest(unittest.TestCase):
+    def test_restores_unsharded_order_and_sums_summary(self) -> None:
+        reports = [
+            ("r2.json", shard_report(2, 2, [1, 2], ["b", "c"], {"total": 2, "pass": 0, "fail": 2})),
+            ("r1.json", shard_report(1, 2, [0, 3], ["a", "d"], {"total": 2, "pass": 1, "skip": 1, "perf_fail": 1})),
+        ]
+        merged = merge_reports(reports)
+        self.assertEqual([row["id"] for row in merged["results"]], ["a", "b", "c", "d"])
+        self.assertEqual(merged["summary"], {"total": 4, "pass": 1, "fail": 2, "skip": 1, "perf_fail": 1})
+        self.assertEqual(merged["scenario_ms"], 20)
+
+    def test_rejects_missing_shard(self) -> None:
+        reports = [
+            ("r1.json", shard_report(1, 3, [0], ["a"])),
+            ("r3.json", shard_report(3, 3, [2], ["c"])),
+        ]
+        with self.assertRaisesRegex(ValueError, "expected shards 1..3"):
+            merge_reports(reports)
+
+    def test_rejects_disagreeing_shard_counts(self) -> None:
+        reports = [
+            ("r1.json", shard_report(1, 2, [0], ["a"])),
+            ("r2.json", shard_report(2, 3, [1], ["b"])),
+        ]
+        with self.assertRaisesRegex(ValueError, "disagree on shard count"):
+            merge_reports(reports)
+
+    def test_rejects_duplicate_shard(self) -> None:
+        reports = [
+            ("r1.json", shard_report(1, 2, [0], ["a"])),
+            ("r1-again.json", shard_report(1, 2, [0], ["a"])),
+        ]
+        with self.assertRaises(ValueError):
+            merge_reports(reports)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Tests for the incremental `*_contains` / `*_regex` matching of streamed output."""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import run_parity  # noqa: E402
+from run_parity import StreamMatcher  # noqa: E402
+
+OUTPUT = "starting\nitem 1 ok\nitem 2 ok\nsummary: 2 passed\ndone"
+
+
+def run(text: str, chunks: list[int], needles: list[str], patterns: list[str]) -> dict[str, list[str]]:
+    matcher = StreamMatcher(needles, patterns)
+    start = 0
+    for end in [*chunks, len(text)]:
+        matcher.feed(text[start:end])
+        start = end
+    matcher.finish()
+    return matcher.summary()
+
+
+def whole(text: str, needles: list[str], patterns: list[str]) -> dict[str, list[str]]:
+    return run(text, [], needles, patterns)
+
+
+class StreamMatcherTest(unittest.TestCase):
+    needles = ["item 2 ok", "summary: 2", "missing"]
+    patterns = [r"^item \d ok$", r"summary: \d+ passed$", r"^done$", r"done\Z", r"^do$", r"ok(?!\n)"]
+
+    def assert_same_at_every_split(self, text: str) -> None:
+        expected = whole(text, self.needles, self.patterns)
+        for cut in range(len(text) + 1):
+            with self.subTest(cut=cut):
+                got = run(text, [cut], self.needles, self.patterns)
+                self.assertEqual(sorted(got["found"]), sorted(expected["found"]))
+                self.assertEqual(sorted(got["matched"]), sorted(expected["matched"]))
+
+    def test_single_chunk(self) -> None:
+        summary = whole(OUTPUT, self.needles, self.patterns)
+        self.assertEqual(sorted(summary["found"]), ["item 2 ok", "summary: 2"])
+        self.assertEqual(
+            sorted(summary["matched"]),
+            sorted([r"^item \d ok$", r"summary: \d+ passed$", r"^done$", r"done\Z"]),
+        )
+
+    def test_every_two_way_split(self) -> None:
+        self.assert_same_at_every_split(OUTPUT)
+
+    def test_every_two_way_split_with_trailing_newline(self) -> None:
+        self.assert_same_at_every_split(OUTPUT + "\n")
+
+    def test_one_char_chunks(self) -> None:
+        expected = whole(OUTPUT, self.needles, self.patterns)
+        got = run(OUTPUT, list(range(1, len(OUTPUT))), self.needles, self.patterns)
+        self.assertEqual(sorted(got["matched"]), sorted(expected["matched"]))
+        self.assertEqual(sorted(got["found"]), sorted(expected["found"]))
+
+    def test_end_anchor_waits_for_eof(self) -> None:
+        matcher = StreamMatcher([], [r"^do$"])
+        matcher.feed("do")
+        self.assertEqual(matcher.summary()["matched"], [])
+        matcher.feed("ne\n")
+        matcher.finish()
+        self.assertEqual(matcher.summary()["matched"], [])
+
+    def test_window_keeps_matching_after_trim(self) -> None:
+        with mock.patch.object(run_parity, "STREAM_MATCH_WINDOW", 32):
+            text = "".join(f"line {n}\n" for n in range(200)) + "tail marker"
+            got = run(text, list(range(7, len(text), 7)), ["line 150\nline 151"], [r"^line 199$", r"marker$"])
+        self.assertEqual(got["found"], ["line 150\nline 151"])
+        self.assertEqual(sorted(got["matched"]), sorted([r"^line 199$", r"marker$"]))
+
+
+if __name__ == "__main__":
+    unittest.main()